@@ -84,6 +84,8 @@ pip install numpy Pillow tifffile argparse scipy
 Required: `numpy`, `Pillow (PIL)`, `tifffile`, `argparse`  
 Optional: `scipy`
 
+Text rendering (8× oversampled labels, Lanczos downscaling) is Pillow-bound. [Pillow-SIMD](https://github.com/uploadcare/pillow-simd) is a drop-in replacement that speeds it up: `pip uninstall Pillow && pip install pillow-simd`
+
 ---
 
 ## Command-Line Usage
@@ -116,6 +118,7 @@ python3 rectarg.py R230122W.cht R230122W.txt output.tif   --target_dpi 300 --bac
 | Optional | `--font_mm [LABEL_MM] [FOOTER_MM]` | Physical text heights (default: 2 mm) |
 | Optional | `--png` | Save PNG preview |
 | Optional | `--debug` | Enable diagnostic output |
+| Optional | `--no-cache` | Always re-parse the .cht and .cie/.txt files instead of reusing the cache in `~/.cache/rectarg` |
 
 ---
 
@@ -338,7 +341,7 @@ Interpreted as:
 
 ### Output
 
-- Default: 16-bit TIFF with embedded DPI.
+- Default: 16-bit TIFF with embedded DPI (lossless Deflate compression).
 - Optional PNG preview (`--png`).
 
 ### Diagnostics
@@ -361,45 +364,48 @@ Interpreted as:
 
 #!/usr/bin/env python3
 from pathlib import Path
-import re, math, argparse, sys, os, fnmatch, string
+import re, math, argparse, sys, os, fnmatch, string, functools, pickle, hashlib
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from PIL import Image, ImageDraw, ImageFont
 import importlib.util
 
-def debug_print(*args, **kwargs):
-    """Print only when --debug flag is active."""
+def debug_print(msg, *args, **kwargs):
+    """
+    Print only when --debug flag is active. Extra args are %-formatted into msg
+    lazily, so hot callers pay no formatting cost without --debug.
+    """
     if globals().get("DEBUG_PARSE", False):
-        print(*args, **kwargs)
+        print(msg % args if args else msg, **kwargs)
 
 # ---------------------------
 # Dependency Checker
 # ---------------------------
 
-REQUIRED_MODULES = ["numpy", "PIL", "tifffile", "argparse"]
+# numpy and PIL are imported unconditionally above; tifffile is probed here
+# and the full check runs only when the CLI starts (check_dependencies).
+REQUIRED_MODULES = ["tifffile"]
 OPTIONAL_MODULES = ["scipy"]
 
-missing = []
-
-for mod in REQUIRED_MODULES:
-    if importlib.util.find_spec(mod) is None:
-        missing.append(mod)
-
-if missing:
-    print("[ERROR] Missing required dependencies:")
-    for m in missing:
-        print(f"  - {m}\n    ➜ Install via: pip install {m}")
-    sys.exit(1)
-
-for mod in OPTIONAL_MODULES:
-    if importlib.util.find_spec(mod) is None:
-        print(f"[Warning] Optional dependency not found: {mod}")
-
 try:
     import tifffile
     HAVE_TIFF = True
 except Exception:
     HAVE_TIFF = False
 
+def check_dependencies():
+    """Exit with install hints if a required module is missing; warn about optional ones."""
+    missing = [mod for mod in REQUIRED_MODULES if mod not in sys.modules]
+
+    if missing:
+        print("[ERROR] Missing required dependencies:")
+        for m in missing:
+            print(f"  - {m}\n    ➜ Install via: pip install {m}")
+        sys.exit(1)
+
+    for mod in OPTIONAL_MODULES:
+        if importlib.util.find_spec(mod) is None:
+            print(f"[Warning] Optional dependency not found: {mod}")
+
 # ---------------------------
 # Defaults and precise scaling constants (based on 100-dpi units -> target DPI)
 # ---------------------------
@@ -419,12 +425,134 @@ FALLBACK_SY_CORR = 1.0003
 FID_OUTER_PX_AT_300 = 40.0
 FID_LINE_PX_AT_300 = 5.0
 
+# Fiducial arm directions by quadrant relative to the chart center, keyed by
+# (sign dx, sign dy); arms point inwards. Anything else is bottom-left style.
+FID_ARM_DIRS = {
+    (-1, -1): ((1, 0), (0, 1)),    # top-left
+    ( 1, -1): ((-1, 0), (0, 1)),   # top-right
+    ( 1,  1): ((-1, 0), (0, -1)),  # bottom-right
+}
+FID_ARM_DIRS_DEFAULT = ((1, 0), (0, -1))
+
+# ---------------------------
+# Precompiled patterns
+# ---------------------------
+# Patch labels (generate_labels / normalize_sid_global); inputs are upper-cased
+_GS_RANGE_RE = re.compile(r'^(GS)(\d+)$')
+_GS_NORM_RE = re.compile(r'^(GS)0*(\d+)$')
+_DIGITS_RE = re.compile(r'^\d+$')
+_ALPHA_RE = re.compile(r'^[A-Z]+$')
+# Numeric prefix + letters, e.g. 2A, 10AB (groups: prefix, letters)
+_PREFIX_ALPHA_RANGE_RE = re.compile(r'^(\d+)([A-Z]+)$')
+# Numeric prefix + letters + zero-padded number, e.g. 2A01 (groups: prefix, letters, number)
+_PREFIXED_NUM_RE = re.compile(r'^(\d+)([A-Z]+)0*(\d+)$')
+# Letters + zero-padded number, e.g. A01, AA1, GS01 (groups: letters, number)
+_ALPHA_NUM_RE = re.compile(r'^([A-Z]+)0*(\d+)$')
+
+# .cht parsing
+_NUM_RE = re.compile(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?')
+# Section locator, one scan: the F line and BOX_SHRINK value are captured directly,
+# XLIST / YLIST only by their header line (bodies are matched from that offset,
+# so a list body never hides an F or BOX_SHRINK line inside it)
+_CHT_SECTIONS_RE = re.compile(
+    r'(?m)^[^\S\n]*(?:'
+    r'(?P<fline>(?i:F) [^\n]*\S)'
+    r'|(?i:BOX_SHRINK)\s+(?P<box_shrink>[-+]?\d*\.?\d+)'
+    r'|(?P<xlist>XLIST)\b'
+    r'|(?P<ylist>YLIST)\b'
+    r')'
+)
+_XLIST_RE = re.compile(r'(?ms)^\s*XLIST\b.*?\n(.*?)(?=^\s*YLIST\b|\Z)')
+_YLIST_RE = re.compile(r'(?ms)^\s*YLIST\b.*?\n(.*?)(?=^\s*(?:EXPECTED|BOX_SHRINK|REF_ROTATION|\Z))')
+# Area line: axis, x start/end, y start/end labels, then tile/pre/post x,y
+# as six separately captured numbers (groups 6-11)
+_AREA_RE = re.compile(
+    r'(?mi)^[ \t]*([XY])\s+([^\s]+)\s+([^\s]+)\s+([^\s]+)\s+([^\s]+)\s+'
+    r'([-+]?\d*\.?\d+)\s+([-+]?\d*\.?\d+)\s+([-+]?\d*\.?\d+)\s+([-+]?\d*\.?\d+)\s+([-+]?\d*\.?\d+)\s+([-+]?\d*\.?\d+)'
+)
+# Prefixed labels like "2A"
+_PREFIXED_ALPHA_RE = re.compile(r'^\d+[A-Z]$', re.I)
+
+# IT8 / CGATS (.cie/.txt) parsing
+_HEADER_KEYS = ('ORIGINATOR', 'DESCRIPTOR', 'CREATED', 'MANUFACTURER', 'SERIAL', 'PROD_DATE')
+_HEADER_RES = {key: re.compile(rf'(?mi)^\s*{key}\s+"?(.*?)"?\s*$') for key in _HEADER_KEYS}
+_DATA_FORMAT_RE = re.compile(r'(?ms)^\s*BEGIN_DATA_FORMAT\b(.*?)^\s*END_DATA_FORMAT\b')
+_DATA_RE = re.compile(r'(?ms)^\s*BEGIN_DATA\b(.*?)^\s*END_DATA\b')
+_LAB_L_ALT_RE = re.compile(r'^(L\*|LAB[-_]?L|LCH_L)$', re.I)
+_LAB_A_ALT_RE = re.compile(r'^(A\*|LAB[-_]?A|LCH_A)$', re.I)
+_LAB_B_ALT_RE = re.compile(r'^(B\*|LAB[-_]?B|LCH_B)$', re.I)
+_TOKEN_RE = re.compile(r'"[^"]*"|\S+')
+# Color column slots tested against every (upper-cased) format field in one pass;
+# a field may fill several slots ('B' is both Lab b and RGB blue). The *_alt
+# slots are only used when the primary Lab name is absent.
+_FMT_COLUMN_RES = (
+    ('L', re.compile(r'LAB_L|L$')),
+    ('A', re.compile(r'LAB_A|A$')),
+    ('B', re.compile(r'LAB_B|B$')),
+    ('L_alt', _LAB_L_ALT_RE),
+    ('A_alt', _LAB_A_ALT_RE),
+    ('B_alt', _LAB_B_ALT_RE),
+    ('R', re.compile(r'(?:RGB_R|R)$')),
+    ('G', re.compile(r'(?:RGB_G|G)$')),
+    ('B_rgb', re.compile(r'(?:RGB_B|B)$')),
+    ('X', re.compile(r'(?:XYZ_X|X)$')),
+    ('Y', re.compile(r'(?:XYZ_Y|Y)$')),
+    ('Z', re.compile(r'(?:XYZ_Z|Z)$')),
+)
+# Plausible sample labels (A01, GS10, ...); GS\d+ is a subset of this class
+_LABEL_RE = re.compile(r'^[A-Z0-9]+$', re.I)
+
+# Patch-count lines (EXPECTED XYZ / PATCHES_ACTIVE / NUMBER_OF_SETS): one scan
+# over the raw file bytes yields every candidate line. CR, LF and CRLF all end
+# a line (some instrument exports use bare CR), as with text-mode reading.
+_COUNT_LINE_RE = re.compile(
+    rb'(?i)(?<![^\r\n])[^\r\n]*(?:EXPECTED XYZ|PATCHES_ACTIVE|NUMBER_OF_SETS)[^\r\n]*'
+)
+_WS_RE = re.compile(rb'\s+')
+
 # ---------------------------
 # Utilities: parsing files
 # ---------------------------
 def read_text(path):
     return Path(path).read_text(encoding='utf-8', errors='replace')
 
+# Parsed .cht/.cie results are pickled here and reused while the input file
+# (and this script) are unchanged. Off for library callers of recreate();
+# main() turns it on unless --no-cache is given.
+PARSE_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "rectarg"
+USE_PARSE_CACHE = False
+
+def cached_parse(parse_fn, path, *args):
+    """Return parse_fn(path, *args), reusing the on-disk cache when still fresh."""
+    if not USE_PARSE_CACHE or globals().get("DEBUG_PARSE", False):
+        # --debug always re-parses so the parser diagnostics are printed
+        return parse_fn(path, *args)
+
+    src = Path(path).resolve()
+    st = src.stat()
+    ident = (parse_fn.__name__, str(src), args)
+    key = (ident, st.st_mtime_ns, st.st_size, os.stat(__file__).st_mtime_ns)
+    cache_file = PARSE_CACHE_DIR / (hashlib.sha1(repr(ident).encode()).hexdigest() + ".pkl")
+
+    try:
+        with open(cache_file, 'rb') as f:
+            cached_key, result = pickle.load(f)
+        if cached_key == key:
+            return result
+    except Exception:
+        pass
+
+    result = parse_fn(path, *args)
+    try:
+        PARSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'wb') as f:
+            pickle.dump((key, result), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_file)
+    except Exception as e:
+        debug_print(f"[Warning] Could not write parse cache {cache_file}: {e}")
+    return result
+
 def parse_cht(path):
     txt = read_text(path)
     out = {'raw': txt, 'fids': [], 'box_shrink': 0.0, 'areas': [], 'xl': [], 'yl': []}
@@ -432,15 +560,18 @@ def parse_cht(path):
     # -------------------------
     # Fiducial coordinates
     # -------------------------
-    fline = None
-    for ln in txt.splitlines():
-        if ln.strip().upper().startswith('F '):
-            fline = ln.strip()
+    # First match of each section, in one pass over the file
+    sections = {}
+    for m in _CHT_SECTIONS_RE.finditer(txt):
+        sections.setdefault(m.lastgroup, m)
+        if len(sections) == 4:
             break
+
+    fline = sections['fline'].group('fline') if 'fline' in sections else None
     if not fline:
         raise RuntimeError("F fiducial line not found in .cht file.")
 
-    nums = [float(x) for x in re.findall(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?', fline)]
+    nums = [float(x) for x in _NUM_RE.findall(fline)]
     start = 0
     while (len(nums)-start) % 2 != 0 and start < len(nums):
         start += 1
@@ -458,60 +589,37 @@ def parse_cht(path):
     # -------------------------
     # Global shrink factor
     # -------------------------
-    mbs = re.search(r'(?mi)^\s*BOX_SHRINK\s+([-+]?\d*\.?\d+)', txt)
-    if mbs:
-        out['box_shrink'] = float(mbs.group(1))
+    if 'box_shrink' in sections:
+        out['box_shrink'] = float(sections['box_shrink'].group('box_shrink'))
 
     # -------------------------
-    # X/Y coordinate lists
+    # X/Y coordinate lists (first number of each line)
     # -------------------------
-    m_x = re.search(r'(?ms)^\s*XLIST\b.*?\n(.*?)(?=^\s*YLIST\b|\Z)', txt, flags=re.M)
-    if m_x:
-        for ln in m_x.group(1).splitlines():
-            fs = re.findall(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?', ln)
-            if fs:
-                out['xl'].append(float(fs[0]))
-
-    m_y = re.search(r'(?ms)^\s*YLIST\b.*?\n(.*?)(?=^\s*(?:EXPECTED|BOX_SHRINK|REF_ROTATION|\Z))', txt, flags=re.M)
-    if m_y:
-        for ln in m_y.group(1).splitlines():
-            fs = re.findall(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?', ln)
-            if fs:
-                out['yl'].append(float(fs[0]))
+    # Each body is matched from its header line, scanning only that section
+    for key, list_re in (('xl', _XLIST_RE), ('yl', _YLIST_RE)):
+        hdr = sections.get(key[0] + 'list')
+        ml = list_re.match(txt, hdr.start()) if hdr else None
+        if ml:
+            for ln in ml.group(1).splitlines():
+                fs = _NUM_RE.search(ln)
+                if fs:
+                    out[key].append(float(fs.group(0)))
 
     # -------------------------
     # Patch area definitions
     # -------------------------
-    area_re = re.compile(
-        r'(?mi)^[ \t]*([XY])\s+([^\s]+)\s+([^\s]+)\s+([^\s]+)\s+([^\s]+)\s+((?:[-+]?\d*\.?\d+\s+){5}[-+]?\d*\.?\d+)',
-        flags=re.M
-    )
-
-    for m in area_re.finditer(txt):
+    for m in _AREA_RE.finditer(txt):
         axis = m.group(1).upper()
         xstart, xend = m.group(2), m.group(3)
         ystart, yend = m.group(4), m.group(5)
 
-        nums = [float(x) for x in re.findall(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?', m.group(6))]
-        if len(nums) != 6:
-            rest = m.group(0).split()[5:]
-            nums = []
-            for tok in rest:
-                try:
-                    nums.append(float(tok))
-                except Exception:
-                    pass
-        if len(nums) != 6:
-            continue
+        nums = [float(x) for x in m.group(6, 7, 8, 9, 10, 11)]
 
         # --- Detect prefixed labels like "2A"
-        def is_prefixed_alpha(label):
-            return bool(re.match(r'^\d+[A-Z]$', label, re.I))
-
         label_mode = None
-        if is_prefixed_alpha(xstart) or is_prefixed_alpha(xend):
+        if _PREFIXED_ALPHA_RE.match(xstart) or _PREFIXED_ALPHA_RE.match(xend):
             label_mode = "prefixed_x"
-        elif is_prefixed_alpha(ystart) or is_prefixed_alpha(yend):
+        elif _PREFIXED_ALPHA_RE.match(ystart) or _PREFIXED_ALPHA_RE.match(yend):
             label_mode = "prefixed_y"
 
         area = {
@@ -523,6 +631,11 @@ def parse_cht(path):
             'post_x': nums[4], 'post_y': nums[5],
             'label_mode': label_mode  # <-- NEW
         }
+        # Row/column labels and counts, computed once and reused by every consumer
+        area['labels_x'] = generate_labels(xstart, xend)
+        area['labels_y'] = generate_labels(ystart, yend)
+        area['ncols'] = len(area['labels_x'])
+        area['nrows'] = len(area['labels_y'])
         out['areas'].append(area)
 
     if not out['areas']:
@@ -535,19 +648,17 @@ def parse_cht(path):
 def parse_it8_or_cie(path, color_space='lab'):
     txt = read_text(path)
     header = {}
-    for key in ('ORIGINATOR', 'DESCRIPTOR', 'CREATED', 'MANUFACTURER', 'SERIAL', 'PROD_DATE'):
-        m = re.search(rf'(?mi)^\s*{key}\s+"?(.*?)"?\s*$', txt)
+    for key, key_re in _HEADER_RES.items():
+        m = key_re.search(txt)
         if m:
-            header[key.upper()] = m.group(1).strip()
+            header[key] = m.group(1).strip()
 
     # --- Parse format block
     fmt = []
-    mfmt = re.search(r'(?ms)^\s*BEGIN_DATA_FORMAT\b(.*?)^\s*END_DATA_FORMAT\b', txt)
+    mfmt = _DATA_FORMAT_RE.search(txt)
     if mfmt:
-        for ln in mfmt.group(1).splitlines():
-            for tok in re.split(r'\s+', ln.strip()):
-                if tok:
-                    fmt.append(tok)
+        # whitespace split over the whole block == per-line split without empties
+        fmt = mfmt.group(1).split()
     fmt_upper = [f.upper() for f in fmt]
 
     # --- Find possible label columns dynamically
@@ -556,39 +667,45 @@ def parse_it8_or_cie(path, color_space='lab'):
         if candidate in fmt_upper:
             label_cols.append(fmt_upper.index(candidate))
 
-    # --- Find LAB (or RGB) columns dynamically
-    idxL = next((i for i, f in enumerate(fmt_upper) if f.startswith('LAB_L') or f == 'L'), None)
-    idxA = next((i for i, f in enumerate(fmt_upper) if f.startswith('LAB_A') or f == 'A'), None)
-    idxB = next((i for i, f in enumerate(fmt_upper) if f.startswith('LAB_B') or f == 'B'), None)
-
-    # --- Fallbacks for alternate label variants like L*, Lab-L, etc. ---
-    if idxL is None:
-        idxL = next((i for i, f in enumerate(fmt_upper)
-                     if re.match(r'^(L\*|LAB[-_]?L|LCH_L)$', f, re.I)), None)
-    if idxA is None:
-        idxA = next((i for i, f in enumerate(fmt_upper)
-                     if re.match(r'^(A\*|LAB[-_]?A|LCH_A)$', f, re.I)), None)
-    if idxB is None:
-        idxB = next((i for i, f in enumerate(fmt_upper)
-                     if re.match(r'^(B\*|LAB[-_]?B|LCH_B)$', f, re.I)), None)
-
-    idxR = next((i for i, f in enumerate(fmt_upper) if f in ('RGB_R', 'R')), None)
-    idxG = next((i for i, f in enumerate(fmt_upper) if f in ('RGB_G', 'G')), None)
-    idxB_rgb = next((i for i, f in enumerate(fmt_upper) if f in ('RGB_B', 'B')), None)
-    idxX = next((i for i, f in enumerate(fmt_upper) if f in ('XYZ_X', 'X')), None)
-    idxY = next((i for i, f in enumerate(fmt_upper) if f in ('XYZ_Y', 'Y')), None)
-    idxZ = next((i for i, f in enumerate(fmt_upper) if f in ('XYZ_Z', 'Z')), None)
+    # --- Find LAB / RGB / XYZ columns dynamically (one pass, first match per slot)
+    slots = {}
+    for i, f in enumerate(fmt_upper):
+        for key, col_re in _FMT_COLUMN_RES:
+            if key not in slots and col_re.match(f):
+                slots[key] = i
+
+    # Alternate label variants like L*, Lab-L, etc. only as a fallback
+    idxL = slots.get('L', slots.get('L_alt'))
+    idxA = slots.get('A', slots.get('A_alt'))
+    idxB = slots.get('B', slots.get('B_alt'))
+    idxR, idxG, idxB_rgb = slots.get('R'), slots.get('G'), slots.get('B_rgb')
+    idxX, idxY, idxZ = slots.get('X'), slots.get('Y'), slots.get('Z')
+
+    # Active color columns depend only on the requested space, not on the row;
+    # they are stored once in the color table, not in every record
+    cs = color_space.lower()
+    if cs == "rgb":
+        space, i1, i2, i3 = "rgb", idxR, idxG, idxB_rgb
+    elif cs == "xyz":
+        space, i1, i2, i3 = "xyz", idxX, idxY, idxZ
+    else:
+        space, i1, i2, i3 = "lab", idxL, idxA, idxB
+
+    # Label columns hold text (A01, GS10, also all-digit ids); only the
+    # remaining columns are tried as numbers
+    label_idx = frozenset(label_cols)
 
     data = []
-    mdata = re.search(r'(?ms)^\s*BEGIN_DATA\b(.*?)^\s*END_DATA\b', txt)
+    mdata = _DATA_RE.search(txt)
     if not mdata:
-        return fmt, {}, header
+        return fmt, {}, header, _build_color_table({}, space, (i1, i2, i3))
 
     for ln in mdata.group(1).splitlines():
         ln = ln.strip()
         if not ln or ln.startswith('#'):
             continue
-        parts = re.findall(r'"[^"]*"|\S+', ln)
+        # Quoted fields are rare in data rows; plain split is equivalent without them
+        parts = ln.split() if '"' not in ln else _TOKEN_RE.findall(ln)
         if len(parts) < 2:
             continue
 
@@ -598,7 +715,7 @@ def parse_it8_or_cie(path, color_space='lab'):
             if c < len(parts):
                 candidate = parts[c].strip('"').strip()
                 # Accept plausible labels like A01, GS10, etc.
-                if re.match(r'^[A-Z0-9]+$', candidate, flags=re.I) or re.match(r'^(GS\d+)$', candidate, flags=re.I):
+                if _LABEL_RE.match(candidate):
                     sid = candidate
                     break
         if not sid:
@@ -606,7 +723,10 @@ def parse_it8_or_cie(path, color_space='lab'):
 
         # --- Preserve all numeric columns exactly as defined in fmt ---
         vals = []
-        for tok in parts:
+        for c, tok in enumerate(parts):
+            if c in label_idx:
+                vals.append(tok)
+                continue
             try:
                 vals.append(float(tok))
             except ValueError:
@@ -614,33 +734,14 @@ def parse_it8_or_cie(path, color_space='lab'):
 
         data.append((sid, vals))
 
-    # Normalize into map form for quick lookup, depending on color space
+    # Normalize into map form for quick lookup
     data_map = {}
     for sid, vals in data:
-        entry = {"vals": vals}
-
-        if color_space.lower() == "lab":
-            entry.update({
-                "space": "lab",
-                "i1": idxL, "i2": idxA, "i3": idxB
-            })
-        elif color_space.lower() == "rgb":
-            entry.update({
-                "space": "rgb",
-                "i1": idxR, "i2": idxG, "i3": idxB_rgb
-            })
-        elif color_space.lower() == "xyz":
-            entry.update({
-                "space": "xyz",
-                "i1": idxX, "i2": idxY, "i3": idxZ
-            })
-        else:
-            entry.update({
-                "space": "lab",
-                "i1": idxL, "i2": idxA, "i3": idxB
-            })
+        data_map[sid.upper()] = {"vals": vals}
 
-        data_map[sid.upper()] = entry
+    # Structure-of-arrays view of the active color columns: one (N,3) float
+    # buffer (NaN where a value is missing or non-numeric) plus parallel SIDs.
+    table = _build_color_table(data_map, space, (i1, i2, i3))
 
     # --- Optional debug output for verifying column detection ---
     if globals().get("DEBUG_PARSE", False):
@@ -655,80 +756,118 @@ def parse_it8_or_cie(path, color_space='lab'):
                   f"{vals[idxB] if idxB is not None else 'N/A'})")
             
     debug_print(f"Loaded {len(data_map)} CIE entries. Example keys: {list(data_map.keys())[:20]}")
-    return fmt, data_map, header
+    return fmt, data_map, header, table
+
+def _build_color_table(data_map, space, cols):
+    """
+    Return {'space', 'cols', 'sids', 'values' (N,3)}; row k of 'values' belongs
+    to sids[k]. 'space'/'cols' are the active color space and its three column
+    indices (None where a column was not found), shared by all records.
+    """
+    sids = list(data_map)
+    values = np.full((len(sids), 3), np.nan)
+    if None not in cols:
+        for k, sid in enumerate(sids):
+            entry = data_map[sid]
+            for j, c in enumerate(cols):
+                try:
+                    values[k, j] = float(entry["vals"][c])
+                except (IndexError, TypeError, ValueError):
+                    pass
+    return {"space": space, "cols": tuple(cols), "sids": sids, "values": values}
 
 # ---------------------------
 # Color conversion functions
 # ---------------------------
 # These follow the CIE 1976 (L*a*b*) standard, which defines 
 # the color space and LAB↔XYZ or XYZ↔sRGB conversion.
-def lab_to_xyz(L, a, b):
-    fy = (L + 16.0) / 116.0
-    fx = fy + a / 500.0
-    fz = fy - b / 200.0
+
+# Reference whites and fixed matrices. The whole XYZ (D50) → Bradford → XYZ (D65)
+# → linear sRGB chain only depends on constants, so it is folded into a single
+# 3×3 matrix once at import instead of being rebuilt for every patch.
+D50_WHITE = np.array([0.96422, 1.0, 0.82521])
+D65_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+M_BRADFORD = np.array([[ 0.8951,  0.2664, -0.1614],
+                       [-0.7502,  1.7135,  0.0367],
+                       [ 0.0389, -0.0685,  1.0296]])
+
+M_XYZ_TO_LINEAR_SRGB = np.array([[ 3.2406, -1.5372, -0.4986],
+                                 [-0.9689,  1.8758,  0.0415],
+                                 [ 0.0557, -0.2040,  1.0570]])
+
+# Inverse of M_BRADFORD as a literal (no LAPACK solve at import)
+M_BRADFORD_INV = np.array([[ 0.9869929054667123,   -0.1470542564209901,  0.15996265166373122 ],
+                           [ 0.43230526972339445,   0.5183602715367774,  0.049291228212855594],
+                           [-0.008528664575177328,  0.04004282165408486, 0.96848669578755    ]])
+assert np.allclose(M_BRADFORD @ M_BRADFORD_INV, np.eye(3))
+
+_ADAPT_D50_TO_D65 = (M_BRADFORD_INV
+                     @ np.diag((M_BRADFORD @ D65_WHITE) / (M_BRADFORD @ D50_WHITE))
+                     @ M_BRADFORD)
+_XYZ_D50_TO_LINEAR_SRGB = M_XYZ_TO_LINEAR_SRGB @ _ADAPT_D50_TO_D65
+
+
+def srgb_compand(rgb_lin):
+    """Vectorized sRGB gamma encoding (IEC 61966-2-1); values <= 0 map to 0."""
+    u = np.asarray(rgb_lin, dtype=float)
+    return np.where(u <= 0.0031308,
+                    12.92 * np.maximum(u, 0.0),
+                    1.055 * np.power(np.maximum(u, 0.0), 1.0/2.4) - 0.055)
+
+
+def lab_array_to_xyz(lab):
+    """Vectorized CIE inverse f(t): (N,3) LAB (D50) -> (N,3) XYZ (D50)."""
+    lab = np.asarray(lab, dtype=float)
+    fy = (lab[:, 0] + 16.0) / 116.0
+    fx = fy + lab[:, 1] / 500.0
+    fz = fy - lab[:, 2] / 200.0
+    t = np.stack([fx, fy, fz], axis=-1)
     d = 6.0 / 29.0
-    def invf(t):
-        return t**3 if t > d else 3*(d**2)*(t - 4.0/29.0)
-    xr, yr, zr = invf(fx), invf(fy), invf(fz)
-    return xr * 0.96422, yr * 1.0, zr * 0.82521
+    # explicit multiplies instead of t**3 (generic pow)
+    xyz = np.where(t > d, t*t*t, 3*d*d*(t - 4.0/29.0))
+    xyz *= D50_WHITE
+    return xyz
 
-def xyz_d50_to_srgb_intent(X, Y, Z, intent="display", clip=False):
+
+def xyz_array_to_srgb(xyz, intent="display", clip=False):
     """
-    Convert XYZ (D50) to sRGB, with intent control.
+    Convert (N,3) XYZ (D50) to sRGB, with intent control.
+    A single matrix product applies Bradford adaptation and XYZ → linear sRGB.
 
     Args:
-        X, Y, Z: Tristimulus values (scaled 0–1 or 0–100).
+        xyz:    Tristimulus values (scaled 0–1).
         intent: 'absolute' = linear (colorimetric reference),
                 'display'  = gamma-encoded (screen view).
         clip:   Whether to clip result to [0,1] range.
-
-    Returns:
-        np.ndarray of 3 floats (R, G, B)
     """
-    # --- Bradford chromatic adaptation: D50 → D65 ---
-    M = np.array([[0.8951, 0.2664, -0.1614],
-                  [-0.7502, 1.7135, 0.0367],
-                  [0.0389, -0.0685, 1.0296]])
-    Mi = np.linalg.inv(M)
-    D50 = np.array([0.96422, 1.0, 0.82521])
-    D65 = np.array([0.95047, 1.0, 1.08883])
-    adapt = Mi @ np.diag((M @ D65) / (M @ D50)) @ M
-    X_a, Y_a, Z_a = adapt @ np.array([X, Y, Z])
-
-    # --- XYZ → linear sRGB ---
-    M2 = np.array([
-        [ 3.2406, -1.5372, -0.4986],
-        [-0.9689,  1.8758,  0.0415],
-        [ 0.0557, -0.2040,  1.0570]
-    ])
-    rgb_lin = M2 @ np.array([X_a, Y_a, Z_a])
-
-    # --- Apply intent ---
+    rgb = np.asarray(xyz, dtype=float) @ _XYZ_D50_TO_LINEAR_SRGB.T
     if intent.lower() in ("display", "perceptual", "relative"):
-        # Apply sRGB gamma encoding
-        def comp_gamma(u):
-            if u <= 0.0:
-                return 0.0
-            if u <= 0.0031308:
-                return 12.92 * u
-            else:
-                return 1.055 * (u ** (1.0/2.4)) - 0.055
-        rgb = np.array([comp_gamma(v) for v in rgb_lin])
-    else:
-        # Absolute (linear) intent
-        rgb = rgb_lin
-
+        rgb = srgb_compand(rgb)
     if clip:
         rgb = np.clip(rgb, 0.0, 1.0)
-
     return rgb
 
+
+def lab_array_to_srgb(lab, intent="display", clip=False):
+    """Vectorized LAB (D50) -> sRGB for a whole (N,3) array of patches."""
+    return xyz_array_to_srgb(lab_array_to_xyz(lab), intent=intent, clip=clip)
+
+
+def srgb_to_rgb16(rgb):
+    """Clip (N,3) or (3,) sRGB floats to 0–1 and quantize to uint16 canvas values."""
+    out = np.clip(np.asarray(rgb, dtype=float), 0.0, 1.0)
+    out *= 65535.0  # in place: one float temporary for the whole batch
+    return out.astype(np.uint16)
+
 # ---------------------------
 # Helpers: labels and geometry
 # ---------------------------
+@functools.lru_cache(maxsize=None)
 def generate_labels(start_tok, end_tok):
     """
-    Generate a list of patch labels between start_tok and end_tok.
+    Generate a tuple of patch labels between start_tok and end_tok.
+    Results are memoized (inputs are short strings, output is immutable).
     Supports:
       - GS01..GS24
       - 01..19
@@ -739,41 +878,54 @@ def generate_labels(start_tok, end_tok):
     """
 
     if start_tok == '_' or end_tok == '_':
-        return []
+        return ()
 
     s = start_tok.strip().upper()
     e = end_tok.strip().upper()
 
     # 1. GS grayscale range
-    m1 = re.match(r'^(GS)(\d+)$', s)
-    m2 = re.match(r'^(GS)(\d+)$', e)
+    m1 = _GS_RANGE_RE.match(s)
+    m2 = _GS_RANGE_RE.match(e)
     if m1 and m2:
         a = int(m1.group(2)); b = int(m2.group(2))
         width = max(len(m1.group(2)), len(m2.group(2)))
-        return [f"GS{idx:0{width}d}" for idx in range(a, b + 1)]
+        return tuple(f"GS{idx:0{width}d}" for idx in range(a, b + 1))
 
     # 2. Pure numeric range
-    if re.match(r'^\d+$', s) and re.match(r'^\d+$', e):
+    if _DIGITS_RE.match(s) and _DIGITS_RE.match(e):
         a = int(s); b = int(e)
         width = max(len(s), len(e))
-        return [f"{idx:0{width}d}" for idx in range(a, b + 1)]
+        return tuple(f"{idx:0{width}d}" for idx in range(a, b + 1))
 
     # 3. Prefixed alphanumeric range (e.g. 2A..2D, 10A..10C)
-    m3 = re.match(r'^(\d+)([A-Z]+)$', s)
-    m4 = re.match(r'^(\d+)([A-Z]+)$', e)
+    m3 = _PREFIX_ALPHA_RANGE_RE.match(s)
+    m4 = _PREFIX_ALPHA_RANGE_RE.match(e)
     if m3 and m4 and m3.group(1) == m4.group(1):
         prefix = m3.group(1)
         sub_start = m3.group(2)
         sub_end = m4.group(2)
         subs = _alpha_range(sub_start, sub_end)
-        return [f"{prefix}{x}" for x in subs]
+        return tuple(f"{prefix}{x}" for x in subs)
 
     # 4. Pure alphabetic range, including Excel-style multi-letter (A..AX, AA..AD)
-    if re.match(r'^[A-Z]+$', s) and re.match(r'^[A-Z]+$', e):
-        return _alpha_range(s, e)
+    if _ALPHA_RE.match(s) and _ALPHA_RE.match(e):
+        return tuple(_alpha_range(s, e))
 
     # 5. Single-token / fallback
-    return [s] if s == e else [s, e]
+    return (s,) if s == e else (s, e)
+
+
+def _num_to_alpha(n):
+    """1 -> A, 26 -> Z, 27 -> AA (Excel-style column name)."""
+    s = ""
+    while n > 0:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+# A..ZZ built once; _ALPHA_TABLE[n - 1] == _num_to_alpha(n)
+_ALPHA_TABLE = tuple(_num_to_alpha(n) for n in range(1, 26 * 26 + 27))
 
 
 def _alpha_range(start, end):
@@ -787,18 +939,13 @@ def _alpha_range(start, end):
             n = n * 26 + (ord(c) - 64)
         return n
 
-    def num_to_alpha(n):
-        s = ""
-        while n > 0:
-            n, r = divmod(n - 1, 26)
-            s = chr(65 + r) + s
-        return s
-
     n1 = alpha_to_num(start)
     n2 = alpha_to_num(end)
     if n2 < n1:
         n1, n2 = n2, n1  # ensure increasing
-    return [num_to_alpha(i) for i in range(n1, n2 + 1)]
+    if n2 <= len(_ALPHA_TABLE):
+        return list(_ALPHA_TABLE[n1 - 1:n2])
+    return [_num_to_alpha(i) for i in range(n1, n2 + 1)]
 
 
 def compute_canvas_extents_from_areas(areas, sx, sy):
@@ -806,33 +953,19 @@ def compute_canvas_extents_from_areas(areas, sx, sy):
     Compute the min/max pixel extents for all defined chart areas.
     Supports single-row/column cases when '_' disables one axis.
     """
-    minx = float('inf')
-    miny = float('inf')
-    maxx = -float('inf')
-    maxy = -float('inf')
-
-    for area in areas:
-        cols = generate_labels(area['xstart'], area['xend'])
-        rows = generate_labels(area['ystart'], area['yend'])
-
-        # if disabled axis → treat as 1 row/column
-        ncols = len(cols) if cols else 1
-        nrows = len(rows) if rows else 1
-
-        left_px = area['pre_x'] * sx
-        top_px = area['pre_y'] * sy
-        right_px = left_px + (ncols * area['tile_x'] * sx)
-        bottom_px = top_px + (nrows * area['tile_y'] * sy)
-
-        minx = min(minx, left_px)
-        miny = min(miny, top_px)
-        maxx = max(maxx, right_px)
-        maxy = max(maxy, bottom_px)
-
-    if minx == float('inf'):
+    if not areas:
         return 0.0, 0.0, 0.0, 0.0
 
-    return minx, miny, maxx, maxy
+    # if disabled axis → treat as 1 row/column
+    counts = np.array([(a['ncols'] or 1, a['nrows'] or 1) for a in areas], dtype=float)
+    geom = np.array([(a['pre_x'], a['pre_y'], a['tile_x'], a['tile_y']) for a in areas], dtype=float)
+
+    left = geom[:, 0] * sx
+    top = geom[:, 1] * sy
+    right = left + (counts[:, 0] * geom[:, 2] * sx)
+    bottom = top + (counts[:, 1] * geom[:, 3] * sy)
+
+    return float(left.min()), float(top.min()), float(right.max()), float(bottom.max())
 
 # ---------------------------
 # DPI detection helper
@@ -849,6 +982,13 @@ A4_DPI_TABLE = {
     600: (4961, 7016),
     1200: (9921, 14031)
 }
+# (dpi, (w, h)) in ascending DPI order, for the smallest-fit search
+_A4_DPI_SORTED = tuple(sorted(A4_DPI_TABLE.items()))
+
+def _a4_px(dpi):
+    """A4 page size in pixels at dpi: table value for standard DPIs, else computed."""
+    return A4_DPI_TABLE.get(int(round(dpi)),
+                            (int(round(210.0 / 25.4 * dpi)), int(round(297.0 / 25.4 * dpi))))
 
 def detect_best_a4_dpi(chart_px_w, chart_px_h, margin_mm):
     """
@@ -863,10 +1003,8 @@ def detect_best_a4_dpi(chart_px_w, chart_px_h, margin_mm):
         preferring landscape fit if both orientations are possible.
     """
     best_fit = None
-    candidates = sorted(A4_DPI_TABLE.keys())
 
-    for dpi in candidates:
-        aw, ah = A4_DPI_TABLE[dpi]  # A4 width,height in pixels at this dpi
+    for dpi, (aw, ah) in _A4_DPI_SORTED:  # A4 width,height in pixels at this dpi
         margin_px = int(round(margin_mm * (dpi / 25.4)))
 
         # total chart including margin
@@ -882,7 +1020,7 @@ def detect_best_a4_dpi(chart_px_w, chart_px_h, margin_mm):
 
     # if none fit, default to highest DPI so scaling will downsize safely
     if best_fit is None:
-        best_fit = max(candidates)
+        best_fit = _A4_DPI_SORTED[-1][0]
 
     return best_fit
 
@@ -890,6 +1028,66 @@ def detect_best_a4_dpi(chart_px_w, chart_px_h, margin_mm):
 # ---------------------------
 # TTC/TTF helper and antialiased rendering (guarantee final height)
 # ---------------------------
+@functools.lru_cache(maxsize=8)
+def find_font(font_path=None):
+    """
+    Resolve the label font once per process: font_path if given (case-insensitive
+    name match in its directory), else the first known font under the system font
+    dirs (searched recursively; Linux keeps fonts in per-family subdirectories).
+    Returns a path or font name usable by ImageFont.truetype, or None.
+    """
+    chosen_font = None
+
+    if font_path is not None:
+        # Accept the exact path if it exists; if not, try case-insensitive matching on directory
+        if os.path.exists(font_path):
+            chosen_font = str(font_path)
+        else:
+            # try to find case-insensitive match in the provided path's directory
+            p = Path(font_path)
+            parent = p.parent if p.parent.exists() else None
+            if parent and parent.is_dir():
+                target_name = p.name.lower()
+                for f in parent.iterdir():
+                    if f.name.lower() == target_name:
+                        chosen_font = str(f)
+                        break
+            # else fall through to generic search
+    if not chosen_font:
+        candidates_dirs = [
+            "/System/Library/Fonts",
+            "/Library/Fonts",
+            "/usr/share/fonts/truetype",
+            "/usr/share/fonts",
+            str(Path(os.environ.get("WINDIR", "C:\\Windows")) / "Fonts")
+        ]
+        font_names = ["Palatino.ttc", "Helvetica.ttc", "Times.ttc", "DejaVuSans.ttf", "Arial.ttf"]
+        for d in candidates_dirs:
+            pd = Path(d)
+            if not pd.is_dir():
+                continue
+            # One walk per directory: index files by lower-case name, then look up
+            # the preferred names in order
+            available = {}
+            for fx in pd.rglob("*"):
+                if fx.is_file():
+                    available.setdefault(fx.name.lower(), fx)
+            chosen_font = next((str(available[fn.lower()]) for fn in font_names
+                                if fn.lower() in available), None)
+            if chosen_font:
+                break
+    if not chosen_font:
+        try:
+            ImageFont.truetype("Palatino.ttf", 10)
+            chosen_font = "Palatino.ttf"
+        except Exception:
+            chosen_font = None
+    return chosen_font
+
+# First working face index per .ttc file, so the index probe runs once per file
+_TTC_INDEX_CACHE = {}
+
+@functools.lru_cache(maxsize=64)
 def try_load_truetype(fontfile, size, index=None):
     if not fontfile:
         raise IOError("No fontfile provided")
@@ -897,11 +1095,15 @@ def try_load_truetype(fontfile, size, index=None):
     try:
         if fontfile.lower().endswith('.ttc'):
             if index is None:
+                if fontfile in _TTC_INDEX_CACHE:
+                    return ImageFont.truetype(fontfile, size, index=_TTC_INDEX_CACHE[fontfile])
                 for i in range(0,8):
                     try:
-                        return ImageFont.truetype(fontfile, size, index=i)
+                        font = ImageFont.truetype(fontfile, size, index=i)
                     except Exception:
                         continue
+                    _TTC_INDEX_CACHE[fontfile] = i
+                    return font
                 return ImageFont.truetype(fontfile, size)
             else:
                 return ImageFont.truetype(fontfile, size, index=index)
@@ -910,24 +1112,26 @@ def try_load_truetype(fontfile, size, index=None):
     except Exception:
         raise
 
+@functools.lru_cache(maxsize=1024)
 def render_text_exact_height(text, fontfile, desired_px_height, scale_factor=8, rotate_deg=0):
     """
     Render text so final cap-height ~ desired_px_height using oversampling + resample.
     rotate_deg rotates clockwise; final image has expand=True behavior.
+    Results are memoized (labels repeat on every side; at most 1024 images are
+    kept, least recently used dropped first): treat the image as read-only.
     """
     if not fontfile:
         f = ImageFont.load_default()
         bbox = ImageDraw.Draw(Image.new('L', (1,1))).textbbox((0,0), text, font=f)
         w, h = bbox[2]-bbox[0], bbox[3]-bbox[1]
-        im = Image.new('L', (w+4, h+4), 255)
-        ImageDraw.Draw(im).text((2,2), text, font=f, fill=0)
+        # drawn white-on-black: already the ink mask, no invert pass needed
+        im = Image.new('L', (w+4, h+4), 0)
+        ImageDraw.Draw(im).text((2,2), text, font=f, fill=255)
         newh = max(1, int(round(desired_px_height)))
         neww = max(1, int(round((w+4) * (newh / float(h+4)))))
         im = im.resize((neww, newh), resample=Image.Resampling.LANCZOS)
         if rotate_deg:
             im = im.rotate(-rotate_deg, expand=True)
-        from PIL import ImageOps
-        im = ImageOps.invert(im)
         return im
 
     # oversampled render for better antialiasing
@@ -940,9 +1144,10 @@ def render_text_exact_height(text, fontfile, desired_px_height, scale_factor=8,
     bbox = dr.textbbox((0, 0), text, font=font)
     w, h = bbox[2]-bbox[0], bbox[3]-bbox[1]
     pad = 8
-    im_s = Image.new('L', (w+pad*2, h+pad*2), 255)
+    # white-on-black: the result is the ink mask directly (no final invert pass)
+    im_s = Image.new('L', (w+pad*2, h+pad*2), 0)
     dr2 = ImageDraw.Draw(im_s)
-    dr2.text((pad - bbox[0], pad - bbox[1]), text, font=font, fill=0)
+    dr2.text((pad - bbox[0], pad - bbox[1]), text, font=font, fill=255)
 
     # Estimate cap-height by measuring capital letters
     cap_text = "H"
@@ -955,22 +1160,22 @@ def render_text_exact_height(text, fontfile, desired_px_height, scale_factor=8,
     new_w = max(1, int(round(im_s.size[0] * scale)))
     new_h = max(1, int(round(im_s.size[1] * scale)))
     im = im_s.resize((new_w, new_h), resample=Image.Resampling.LANCZOS)
-    im = im.filter(ImageFilter.GaussianBlur(radius=0.3))
     
     if rotate_deg:
         im = im.rotate(-rotate_deg, expand=True)
 
-    from PIL import ImageOps
-    im = ImageOps.invert(im)  # <-- FIX: invert before returning
     return im
 
 
 # ----------------------------
 # Missing patch reporting + consistency check between .cht and .cie
 # ----------------------------
+@functools.lru_cache(maxsize=4096)
 def normalize_sid_global(sid):
     """
     Normalize sample IDs to a consistent canonical form.
+    Memoized: the same few hundred labels are normalized by painting,
+    lookup and the final consistency check.
 
     Handles:
       A1, A01, A001        -> A1
@@ -982,45 +1187,45 @@ def normalize_sid_global(sid):
     sid_orig = str(sid or "").strip()
     sid_up = sid_orig.upper()
 
-    debug_print(f"[normalize_sid_global] raw='{sid_orig}' upper='{sid_up}'")
+    debug_print("[normalize_sid_global] raw='%s' upper='%s'", sid_orig, sid_up)
 
     # --- Gray strip special case (GS00–GS99 etc.)
-    m = re.match(r"^(GS)0*(\d+)$", sid_up)
+    m = _GS_NORM_RE.match(sid_up)
     if m:
         base, num = m.groups()
         normalized = f"{base}{int(num)}"
-        debug_print(f" → Matched gray strip: '{sid_up}' → '{normalized}'")
+        debug_print(" → Matched gray strip: '%s' → '%s'", sid_up, normalized)
         return normalized
 
     # --- Numeric prefix + alphabetic + numeric suffix, e.g. 2A01, 10AB12
-    m = re.match(r"^(\d+)([A-Z]+)0*(\d+)$", sid_up)
+    m = _PREFIXED_NUM_RE.match(sid_up)
     if m:
         num_prefix, letters, num_suffix = m.groups()
         normalized = f"{num_prefix}{letters}{int(num_suffix)}"
-        debug_print(f" → Matched prefixed form: '{sid_up}' → '{normalized}'")
+        debug_print(" → Matched prefixed form: '%s' → '%s'", sid_up, normalized)
         return normalized
 
     # --- Pure alphabetic + numeric (handles A01, AA1, AX02, etc.)
-    m = re.match(r"^([A-Z]+)0*(\d+)$", sid_up)
+    m = _ALPHA_NUM_RE.match(sid_up)
     if m:
         letters, num_suffix = m.groups()
         normalized = f"{letters}{int(num_suffix)}"
-        debug_print(f" → Matched alpha+num form: '{sid_up}' → '{normalized}'")
+        debug_print(" → Matched alpha+num form: '%s' → '%s'", sid_up, normalized)
         return normalized
 
     # --- Pure numeric patch (rare, but valid in test charts)
-    if re.match(r"^\d+$", sid_up):
+    if _DIGITS_RE.match(sid_up):
         normalized = str(int(sid_up))
-        debug_print(f" → Pure numeric: '{sid_up}' → '{normalized}'")
+        debug_print(" → Pure numeric: '%s' → '%s'", sid_up, normalized)
         return normalized
 
     # --- Pure alphabetic patch (single chip names like 'A', 'AA', etc.)
-    if re.match(r"^[A-Z]+$", sid_up):
-        debug_print(f" → Pure alphabetic patch: '{sid_up}' unchanged")
+    if _ALPHA_RE.match(sid_up):
+        debug_print(" → Pure alphabetic patch: '%s' unchanged", sid_up)
         return sid_up
 
     # --- Fallback: return as-is
-    debug_print(f" → No match: returning unchanged '{sid_up}'")
+    debug_print(" → No match: returning unchanged '%s'", sid_up)
     return sid_up
 
 
@@ -1045,9 +1250,9 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
     6.Render all patches"""
     
     
-    cht = parse_cht(cht_path)
+    cht = cached_parse(parse_cht, cht_path)
     # parse CIE/IT8 file
-    fmt, data_map, header = parse_it8_or_cie(cie_path, color_space=color_space)
+    fmt, data_map, header, color_table = cached_parse(parse_it8_or_cie, cie_path, color_space)
 
     # -------------------------------------------------------
     # Manual per-area label visibility override from CLI
@@ -1074,58 +1279,93 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
     # -------------------------------------------------------------
     # Detect and set global normalization scale based on color_space
     # -------------------------------------------------------------
-    def detect_scale_for_space(data_map, space, debug_print):
-        """Determine a global normalization factor for the active color space using per-record index mapping."""
-        vals_all = []
-
-        # Collect all numeric values from records of the chosen color space
-        for rec in data_map.values():
-            if rec.get("space", "").lower() != space:
-                continue
-            vals = rec.get("vals")
-            i1, i2, i3 = rec.get("i1"), rec.get("i2"), rec.get("i3")
-            if vals and None not in (i1, i2, i3):
-                try:
-                    v1, v2, v3 = float(vals[i1]), float(vals[i2]), float(vals[i3])
-                    vals_all.extend([v1, v2, v3])
-                except Exception:
-                    continue
-
-        if not vals_all:
-            debug_print(f"[ScaleDetect] No numeric data found for {space.upper()} → scale=1.0")
+    def detect_scale_for_space(table, space, debug_print):
+        """Determine a global normalization factor for the active color space from the parsed (N,3) color table."""
+        # Rows of the chosen color space whose three values are all numeric
+        vals_all = table["values"]
+        if table["space"] != space or None in table["cols"]:
+            vals_all = vals_all[:0]
+        vals_all = vals_all[~np.isnan(vals_all).any(axis=1)]
+
+        if not vals_all.size:
+            debug_print("[ScaleDetect] No numeric data found for %s → scale=1.0", space.upper())
             return 1.0
 
-        vmax = max(vals_all)
-        vmean = sum(vals_all) / len(vals_all)
+        vmax = float(vals_all.max())
+        vmean = float(vals_all.mean())
 
         # Decide scaling factor by magnitude range
         if space == "xyz":
             if vmax > 5.0:
                 factor = 1.0 / 100.0
-                debug_print(f"[ScaleDetect] XYZ range ~0–100 (vmax={vmax:.2f}, mean={vmean:.2f}) → apply /100")
+                debug_print("[ScaleDetect] XYZ range ~0–100 (vmax=%.2f, mean=%.2f) → apply /100", vmax, vmean)
             else:
                 factor = 1.0
-                debug_print(f"[ScaleDetect] XYZ range ~0–1 (vmax={vmax:.2f}) → no scaling")
+                debug_print("[ScaleDetect] XYZ range ~0–1 (vmax=%.2f) → no scaling", vmax)
 
         elif space == "rgb":
             if vmax > 5.0 and vmax <= 255.0:
                 factor = 1.0 / 255.0
-                debug_print(f"[ScaleDetect] RGB range ~0–255 (vmax={vmax:.2f}, mean={vmean:.2f}) → apply /255")
+                debug_print("[ScaleDetect] RGB range ~0–255 (vmax=%.2f, mean=%.2f) → apply /255", vmax, vmean)
             elif vmax > 255.0:
                 factor = 1.0 / 65535.0
-                debug_print(f"[ScaleDetect] RGB range ~0–65535 (vmax={vmax:.2f}, mean={vmean:.2f}) → apply /65535")
+                debug_print("[ScaleDetect] RGB range ~0–65535 (vmax=%.2f, mean=%.2f) → apply /65535", vmax, vmean)
             else:
                 factor = 1.0
-                debug_print(f"[ScaleDetect] RGB range ~0–1 (vmax={vmax:.2f}) → no scaling")
+                debug_print("[ScaleDetect] RGB range ~0–1 (vmax=%.2f) → no scaling", vmax)
 
         else:
             factor = 1.0
-            debug_print(f"[ScaleDetect] LAB space → unitless, no scaling")
+            debug_print("[ScaleDetect] LAB space → unitless, no scaling")
 
         return factor
 
     # Apply global detection based on selected color_space
-    scale_factor = detect_scale_for_space(data_map, color_space.lower(), debug_print)     
+    scale_factor = detect_scale_for_space(color_table, color_space.lower(), debug_print)     
+
+    # -------------------------------------------------------------
+    # Convert all CIE records to RGB in one vectorized pass
+    # -------------------------------------------------------------
+    def convert_records_to_rgb(data_map, table, intent, scale_factor):
+        """
+        Convert the parsed (N,3) color table in one call and attach rec['rgb'] plus
+        the quantized rec['rgb16'], so painting only looks colors up.
+        """
+        values = table["values"]
+        rgb_all = np.full(values.shape, np.nan)
+        ok = ~np.isnan(values).any(axis=1)
+        space = table["space"]
+        if ok.any():
+            arr = values[ok]
+            if space == "lab":
+                rgb_all[ok] = lab_array_to_srgb(arr, intent=intent, clip=False)
+            elif space == "xyz":
+                # In XYZ/LAB paths, scale_factor applied before conversion to sRGB
+                rgb_all[ok] = xyz_array_to_srgb(arr * scale_factor, intent=intent, clip=False)
+            elif space == "rgb":
+                # Treat as already gamma-encoded sRGB
+                rgb_all[ok] = arr * scale_factor
+
+        # Without detected color columns: take each record's first three values as RGB
+        for k, sid in enumerate(table["sids"] if None in table["cols"] else ()):
+            rec = data_map[sid]
+            if rec.get("vals"):
+                try:
+                    rgb = np.array([float(v) for v in rec["vals"][:3]])
+                    if np.max(rgb) > 1.5:
+                        rgb /= 255.0
+                    rgb_all[k] = rgb
+                except Exception:
+                    pass
+
+        have = np.flatnonzero(~np.isnan(rgb_all).any(axis=1))
+        rgb16_all = srgb_to_rgb16(rgb_all[have])
+        for k, rgb16 in zip(have, rgb16_all):
+            rec = data_map[table["sids"][k]]
+            rec["rgb"] = rgb_all[k]
+            rec["rgb16"] = rgb16
+
+    convert_records_to_rgb(data_map, color_table, intent, scale_factor)
 
 
     
@@ -1140,51 +1380,47 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
             }
         data_map = tmp
 
+    # ---------- helper: index CIE records once by canonical SID (A01 → A1, GS01 → GS1, 2A01 → 2A1) ----------
+    rec_by_sid = {}
+    for key, rec in data_map.items():
+        rec_by_sid.setdefault(normalize_sid_global(key), rec)
+
     # ---------- helper: find normalized entry for a SID (nested so it can see data_map) ----------
+    # Debug flag read once for this render; per-patch traces below are only
+    # formatted when it is set
+    _dbg = globals().get("DEBUG_PARSE", False)
+
+    sid_lookup_cache = {}
+
     def find_vals_for_sid(sid):
         """
         Return normalized entry dict or None.
-        Tries all reasonable label variants (A1 ↔ A01 ↔ A001, GS1 ↔ GS01, etc.)
+        Matches all label variants (A1 ↔ A01 ↔ A001, GS1 ↔ GS01, etc.)
+        with two dict lookups: the raw key, then its canonical form.
+        Results (misses included) are memoized per render.
         """
 
         if not sid:
             return None
-        debug_print(f"→ find_vals_for_sid('{sid}')")
+        if sid in sid_lookup_cache:
+            return sid_lookup_cache[sid]
+        if _dbg:
+            print(f"→ find_vals_for_sid('{sid}')")
         s = str(sid).strip().upper()
 
         # Direct match
-        if s in data_map:
-            debug_print(f"✅ Direct match: '{s}' found in data_map")
-            return data_map[s]
+        rec = data_map.get(s)
+        if rec is not None:
+            if _dbg:
+                print(f"✅ Direct match: '{s}' found in data_map")
+        else:
+            # Zero-padding variants (GS1 ↔ GS01, A1 ↔ A01, 2A1 ↔ 2A01)
+            rec = rec_by_sid.get(normalize_sid_global(s))
+            if rec is None and _dbg:
+                print(f"❌ No match for '{sid}' (normalized: '{s}')")
 
-        # Handle GS / grayscale variants
-        m = re.match(r'^(GS)(0*)(\d+)$', s, flags=re.I)
-        if m:
-            base, _, num = m.groups()
-            num = int(num)
-            for w in (1, 2, 3):
-                cand = f"{base.upper()}{num:0{w}d}"
-                if cand in data_map:
-                    return data_map[cand]
-            cand = f"{base.upper()}{num}"
-            if cand in data_map:
-                return data_map[cand]
-
-        # Generic letter-number forms (A1 ↔ A01)
-        m2 = re.match(r'^([A-Z]+)(0*)(\d+)$', s)
-        if m2:
-            prefix, _, num = m2.groups()
-            num = int(num)
-            for w in (1, 2, 3):
-                cand = f"{prefix.upper()}{num:0{w}d}"
-                if cand in data_map:
-                    return data_map[cand]
-            cand = f"{prefix.upper()}{num}"
-            if cand in data_map:
-                return data_map[cand]
-
-        debug_print(f"❌ No match for '{sid}' (normalized: '{s}')")
-        return None
+        sid_lookup_cache[sid] = rec
+        return rec
 
         
     areas = cht.get('areas', [])
@@ -1224,37 +1460,17 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
     else:
         print(f"No target_dpi specified -> rendering at {used_dpi} dpi by default (preserve physical size).")
 
-    # --- Compute scale factors relative to the detected A4 match ---
-    # Each A4 DPI has a known pixel size (A4_DPI_TABLE)
-    if int(round(detected_dpi)) in A4_DPI_TABLE:
-        det_w, det_h = A4_DPI_TABLE[int(round(detected_dpi))]
-    else:
-        det_w = int(round(210.0 / 25.4 * detected_dpi))
-        det_h = int(round(297.0 / 25.4 * detected_dpi))
-
-    if int(round(used_dpi)) in A4_DPI_TABLE:
-        tgt_w, tgt_h = A4_DPI_TABLE[int(round(used_dpi))]
-    else:
-        tgt_w = int(round(210.0 / 25.4 * used_dpi))
-        tgt_h = int(round(297.0 / 25.4 * used_dpi))
-
     # --- Scale factors from detected→target DPI (preserve physical size with high precision) ---
+    # The physical DPI ratio cancels out, leaving the A4 pixel-size ratio
+    # between the two DPIs (A4_DPI_TABLE), which also corrects the aspect.
     if used_dpi == detected_dpi:
         # No scaling needed
         scale_x = scale_y = 1.0
     else:
-        # Physical scaling ratio (DPI ratio)
-        dpi_ratio = used_dpi / detected_dpi
-
-        # A4 aspect correction: use width/height ratio between A4 pixel sizes at the two DPIs
-        det_w, det_h = A4_DPI_TABLE.get(int(round(detected_dpi)),
-                                        (int(210/25.4*detected_dpi), int(297/25.4*detected_dpi)))
-        tgt_w, tgt_h = A4_DPI_TABLE.get(int(round(used_dpi)),
-                                        (int(210/25.4*used_dpi), int(297/25.4*used_dpi)))
-
-        # Combine both factors — but in the correct direction
-        scale_x = dpi_ratio * (tgt_w / det_w) / (used_dpi / detected_dpi)
-        scale_y = dpi_ratio * (tgt_h / det_h) / (used_dpi / detected_dpi)
+        det_w, det_h = _a4_px(detected_dpi)
+        tgt_w, tgt_h = _a4_px(used_dpi)
+        scale_x = tgt_w / det_w
+        scale_y = tgt_h / det_h
 
     SX = scale_x
     SY = scale_y
@@ -1269,8 +1485,9 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
     if not user_specified_dpi and detected_dpi != used_dpi:
         debug_print(f"Scaling: detected {detected_dpi} -> used {used_dpi} dpi (will change pixel density but preserve physical chart size).")
 
-    def unit_to_px(xu, yu):
-        return xu * SX, yu * SY
+    def unit_to_px_array(xyu):
+        """Map an (N,2) array of .cht unit coordinates to pixels (without offset)."""
+        return np.asarray(xyu, dtype=float).reshape(-1, 2) * np.array([SX, SY])
 
     mapping_method = 'units_to_px'
     A = None
@@ -1294,26 +1511,21 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
 #                pass
 
     # --- Compute full extents including both Y and X areas ---
+    # (every area spans at least one tile row, so the 'X'/GS row bottom is included)
     minx_area, miny_area, maxx_area, maxy_area = compute_canvas_extents_from_areas(areas, SX, SY)
 
-    # The 'X' area (GS row) often extends further down — include it
-    for area in areas:
-        if area['axis'].upper() == 'X':
-            gs_bottom = (area['pre_y'] + area['tile_y']) * SY
-            if gs_bottom > maxy_area:
-                maxy_area = gs_bottom
-                
-    fids_px_raw = [unit_to_px(xu, yu) for xu, yu in fids_units]
-    fxs_raw = [p[0] for p in fids_px_raw]; fys_raw = [p[1] for p in fids_px_raw]
-    minx_raw = min(minx_area, min(fxs_raw))
-    miny_raw = min(miny_area, min(fys_raw))
-    maxx_raw = max(maxx_area, max(fxs_raw))
-    maxy_raw = max(maxy_area, max(fys_raw))
+    # All fiducials mapped to px in one array op
+    fids_px_raw = unit_to_px_array(fids_units)
+    fid_min = fids_px_raw.min(axis=0); fid_max = fids_px_raw.max(axis=0)
+    minx_raw = min(minx_area, float(fid_min[0]))
+    miny_raw = min(miny_area, float(fid_min[1]))
+    maxx_raw = max(maxx_area, float(fid_max[0]))
+    maxy_raw = max(maxy_area, float(fid_max[1]))
 
     margin_px = int(round(page_margin_mm * px_per_mm))
     offset_x = margin_px - minx_raw
     offset_y = margin_px - miny_raw
-    fids_px = [(fx + offset_x, fy + offset_y) for fx, fy in fids_px_raw]
+    fids_px = (fids_px_raw + np.array([offset_x, offset_y])).tolist()
     minx = minx_raw + offset_x; miny = miny_raw + offset_y
     maxx = maxx_raw + offset_x; maxy = maxy_raw + offset_y
 
@@ -1322,67 +1534,40 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
     H = int(math.ceil(maxy + margin_px + footer_space_px))
     W = max(W, 400); H = max(H, 300)
 
-    canvas = np.full((H, W, 3), 65535, dtype=np.uint16)
-
-    # data_map is already normalized by parser — nothing to reassign
-    # data_map = data no longer needed.
-
+    # Fallback color for patches without usable CIE data
+    gray_rgb = np.array([0.5, 0.5, 0.5])
+    gray_rgb16 = srgb_to_rgb16(gray_rgb)
 
     # --- Optional background color from specified patch label ---
+    # Resolved before allocation so the canvas is filled once with its final color
+    bg_rgb16 = np.array([65535, 65535, 65535], dtype=np.uint16)
     if background_patch:
         bg_label = background_patch.strip().upper()
-        rec_bg = None
-        try:
-            rec_bg = find_vals_for_sid(bg_label)
-        except Exception:
-            rec_bg = None
+        rec_bg = find_vals_for_sid(bg_label)
         if rec_bg and rec_bg.get("vals"):
-            try:
-                vals_bg = rec_bg["vals"]
-                space = rec_bg.get("space", color_space.lower())
-                i1, i2, i3 = rec_bg.get("i1"), rec_bg.get("i2"), rec_bg.get("i3")
-
-                if None not in (i1, i2, i3):
-                    c1, c2, c3 = float(vals_bg[i1]), float(vals_bg[i2]), float(vals_bg[i3])
-
-                    if space == "lab":
-                        X, Y, Z = lab_to_xyz(c1, c2, c3)
-                        # In XYZ/LAB paths, scale_factor applied before sending values to xyz_d50_to_srgb_intent()
-                        rgb_lin = xyz_d50_to_srgb_intent(X, Y, Z, intent=intent, clip=False)
-
-                    elif space == "xyz":
-                        # In XYZ/LAB paths, scale_factor applied before sending values to xyz_d50_to_srgb_intent()
-                        c1, c2, c3 = c1 * scale_factor, c2 * scale_factor, c3 * scale_factor
-                        rgb_lin = xyz_d50_to_srgb_intent(c1, c2, c3, intent=intent, clip=False)
-
-                    elif space == "rgb":
-                        # Treat as already gamma-encoded sRGB
-                        rgb_lin = np.array([c1, c2, c3]) * scale_factor
-                        #c1, c2, c3 = c1 * scale_factor, c2 * scale_factor, c3 * scale_factor
-                        #rgb_lin = np.array([c1, c2, c3])
-
-                    else:
-                        rgb_lin = np.array([0.5, 0.5, 0.5])
-                else:
-                    rgb_lin = np.array([0.5, 0.5, 0.5])
-
-                rgb_display = np.clip(rgb_lin, 0.0, 1.0)
-                rgb16 = (rgb_display * 65535.0).astype(np.uint16)
-                canvas[:, :, :] = rgb16
-                print(f"Background filled from patch '{bg_label}' → RGB {rgb_display}")
-
-            except Exception as e:
-                print(f"Warning: failed to apply background from patch '{bg_label}': {e}", file=sys.stderr)
+            # Converted up front by convert_records_to_rgb(); gray like the patches otherwise
+            bg_rgb = rec_bg.get("rgb", gray_rgb)
+            bg_rgb16 = rec_bg.get("rgb16", gray_rgb16)
+            print(f"Background filled from patch '{bg_label}' → RGB {np.clip(bg_rgb, 0.0, 1.0)}")
         else:
             print(f"Warning: background patch '{bg_label}' not found in CIE data.", file=sys.stderr)
 
+    canvas = np.empty((H, W, 3), dtype=np.uint16)
+    canvas[...] = bg_rgb16
+
             
     # Determine actual expected labels only from defined .cht patch positions
     # to prevent false "missing" warnings for non-existent inferred labels.
     patch_positions = {}
     missing_labels = set()
-    sample_order_list = []
-    color_debug_list = []
+
+    # Painted patches in drawing order: SIDs plus parallel preallocated arrays
+    # (an area with a disabled axis still paints one row/column)
+    n_patches = sum(max(1, a['ncols']) * max(1, a['nrows']) for a in areas)
+    sample_sids = []
+    sample_bboxes = np.empty((n_patches, 4), dtype=np.int32)
+    sample_rgbf = np.empty((n_patches, 3))
+    sample_rgb16 = np.empty((n_patches, 3), dtype=np.uint16)
     
     def make_patch_label(area, rlabel, clabel):
         """Combine row/column labels depending on area label_mode."""
@@ -1413,51 +1598,7 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
     draw = ImageDraw.Draw(annot)
 
     # Font find: case-insensitive search and support for macOS TTC names
-    chosen_font = None
-    user_font_provided = (font_path is not None)
-    
-    if user_font_provided:
-        # Accept the exact path if it exists; if not, try case-insensitive matching on directory
-        if os.path.exists(font_path):
-            chosen_font = str(font_path)
-        else:
-            # try to find case-insensitive match in the provided path's directory
-            p = Path(font_path)
-            parent = p.parent if p.parent.exists() else None
-            if parent and parent.is_dir():
-                target_name = p.name.lower()
-                for f in parent.iterdir():
-                    if f.name.lower() == target_name:
-                        chosen_font = str(f)
-                        break
-            # else fall through to generic search
-    if not chosen_font:
-        candidates_dirs = [
-            "/System/Library/Fonts",
-            "/Library/Fonts",
-            "/usr/share/fonts/truetype",
-            "/usr/share/fonts",
-            str(Path(os.environ.get("WINDIR", "C:\\Windows")) / "Fonts")
-        ]
-        font_names = ["Palatino.ttc", "Helvetica.ttc", "Times.ttc", "DejaVuSans.ttf", "Arial.ttf"]
-        for d in candidates_dirs:
-            pd = Path(d)
-            if pd.exists() and pd.is_dir():
-                for fn in font_names:
-                    for fx in pd.glob("**/*"):
-                        if fx.is_file() and fx.name.lower() == fn.lower():
-                            chosen_font = str(fx)
-                            break
-                    if chosen_font:
-                        break
-            if chosen_font:
-                break
-    if not chosen_font:
-        try:
-            ImageFont.truetype("Palatino.ttf", 10)
-            chosen_font = "Palatino.ttf"
-        except Exception:
-            chosen_font = None
+    chosen_font = find_font(font_path)
 
     if not chosen_font:
         print(f"Warning: no font TTF/TTC found; text mm control may be inexact.", file=sys.stderr)
@@ -1472,13 +1613,23 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
     small_gap_px = int(round(0.5 * px_per_mm))
 
 
+    # Pixel bounds (left, top, right, bottom) of every area, for neighbour detection
+    area_bounds = np.array([
+        (a['pre_x'] * SX + offset_x,
+         a['pre_y'] * SY + offset_y,
+         a['pre_x'] * SX + offset_x + max(1, a['ncols']) * a['tile_x'] * SX,
+         a['pre_y'] * SY + offset_y + max(1, a['nrows']) * a['tile_y'] * SY)
+        for a in areas
+    ]).reshape(-1, 4)
+    nb_l, nb_t, nb_r, nb_b = area_bounds.T
+
     # Unified area renderer — handles any X/Y definition consistently
-    for area in areas:
+    for ai, area in enumerate(areas):
         axis = area['axis']
-        labels_x = generate_labels(area['xstart'], area['xend'])
-        labels_y = generate_labels(area['ystart'], area['yend'])
-        ncols = len(labels_x)
-        nrows = len(labels_y)
+        labels_x = area['labels_x']
+        labels_y = area['labels_y']
+        ncols = area['ncols']
+        nrows = area['nrows']
         tile_x = area['tile_x']; tile_y = area['tile_y']
         pre_x = area['pre_x']; pre_y = area['pre_y']
         post_x = area['post_x']; post_y = area['post_y']
@@ -1494,103 +1645,95 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
         total_h = nrows * tile_y * SY if nrows > 0 else tile_y * SY
 
         # --- compute x, y grid edges with integer rounding ---
+        # the remainder pixels go to the first columns/rows
         if ncols > 0:
             base_w = int(math.floor(total_w / ncols))
             remainder_w = int(round(total_w - base_w * ncols))
-            widths = [base_w + (1 if i < remainder_w else 0) for i in range(ncols)]
-            x_edges = [int(round(start_x_px))]
-            for w in widths:
-                x_edges.append(x_edges[-1] + w)
+            widths = np.full(ncols, base_w, dtype=np.int64)
+            widths[:remainder_w] += 1
+            x0 = int(round(start_x_px))
+            x_edges = np.concatenate(([x0], x0 + np.cumsum(widths)))
         else:
-            x_edges = [int(round(start_x_px)), int(round(start_x_px + total_w))]
+            x_edges = np.array([int(round(start_x_px)), int(round(start_x_px + total_w))])
 
         if nrows > 0:
             base_h = int(math.floor(total_h / nrows))
             remainder_h = int(round(total_h - base_h * nrows))
-            heights = [base_h + (1 if i < remainder_h else 0) for i in range(nrows)]
-            y_edges = [int(round(start_y_px))]
-            for h in heights:
-                y_edges.append(y_edges[-1] + h)
+            heights = np.full(nrows, base_h, dtype=np.int64)
+            heights[:remainder_h] += 1
+            y0 = int(round(start_y_px))
+            y_edges = np.concatenate(([y0], y0 + np.cumsum(heights)))
         else:
-            y_edges = [int(round(start_y_px)), int(round(start_y_px + total_h))]
+            y_edges = np.array([int(round(start_y_px)), int(round(start_y_px + total_h))])
 
         # --- unified patch drawing loop ---
         # even if nrows == 0, we still iterate once; same for ncols == 0
         if nrows == 0:
             labels_y = ['_']
-            y_edges = [int(round(start_y_px)), int(round(start_y_px + total_h))]
             nrows = 1
         if ncols == 0:
             labels_x = ['_']
-            x_edges = [int(round(start_x_px)), int(round(start_x_px + total_w))]
             ncols = 1
 
-        for r_idx, rlabel in enumerate(labels_y):
-            for c_idx, clabel in enumerate(labels_x):
-                sid = make_patch_label(area, rlabel, clabel)
-
-                x0f = x_edges[c_idx]
-                x1f = x_edges[c_idx + 1]
-                y0f = y_edges[r_idx]
-                y1f = y_edges[r_idx + 1]
+        # Edges clamped to the canvas once for the whole area
+        xe = np.clip(x_edges, 0, W)
+        ye = np.clip(y_edges, 0, H)
 
-                debug_print(f"Checking patch label '{sid}' from .cht")
-                rec = find_vals_for_sid(sid.upper())
-                if not rec:
-                    debug_print(f"⚠️ Missing CIE entry for '{sid.upper()}' — using gray fallback")
-                rgb = np.array([0.5, 0.5, 0.5])
+        # Resolve the color of every patch in this area first, then fill
+        patch_sids = []
+        patch_rgbs = []
+        patch_rgb16 = []
+        for rlabel in labels_y:
+            for clabel in labels_x:
+                # normalize_sid_global output: already stripped and upper-case
+                sid = make_patch_label(area, rlabel, clabel)
 
+                if _dbg:
+                    print(f"Checking patch label '{sid}' from .cht")
+                rec = find_vals_for_sid(sid)
+                if not rec and _dbg:
+                    print(f"⚠️ Missing CIE entry for '{sid}' — using gray fallback")
                 if rec and rec.get("vals"):
-                    vals = rec["vals"]
-                    space = rec.get("space", color_space.lower())
-                    i1 = rec.get("i1"); i2 = rec.get("i2"); i3 = rec.get("i3")
-
-                    if None not in (i1, i2, i3):
-                        try:
-                            c1, c2, c3 = float(vals[i1]), float(vals[i2]), float(vals[i3])
-                            if space == "lab":
-                                rgb = xyz_d50_to_srgb_intent(*lab_to_xyz(c1, c2, c3), intent=intent, clip=False)
-                            elif space == "xyz":
-                                rgb = xyz_d50_to_srgb_intent(c1 * scale_factor,
-                                                             c2 * scale_factor,
-                                                             c3 * scale_factor,
-                                                             intent=intent, clip=False)
-                            elif space == "rgb":
-                                rgb = np.array([c1, c2, c3]) * scale_factor
-                            else:
-                                rgb = np.array([0.5, 0.5, 0.5])
-                        except Exception as e:
-                            debug_print(f"❌ Conversion failed for {sid}: {e}")
-                    else:
-                        try:
-                            rgb = np.array([float(v) for v in vals[:3]])
-                            if np.max(rgb) > 1.5:
-                                rgb /= 255.0
-                        except Exception:
-                            pass
+                    # Converted and quantized up front by convert_records_to_rgb()
+                    rgb = rec.get("rgb", gray_rgb)
+                    rgb16 = rec.get("rgb16", gray_rgb16)
                 else:
-                    missing_labels.add(sid.upper())
+                    missing_labels.add(sid)
+                    rgb, rgb16 = gray_rgb, gray_rgb16
 
-                rgb_display = np.clip(rgb, 0.0, 1.0)
-                rgb16 = (rgb_display * 65535.0).astype(np.uint16)
                 # DEBUG: inspect a few patch RGB values to verify scaling/gamma
-                if sid.upper() in ("A1", "M10"):  # choose 1–3 representative patches
-                    debug_print(f"[DEBUG] Check RGB {sid.upper()} → rgb_display = {rgb_display}")
-
-                x0c = max(0, min(W, x0f)); x1c = max(0, min(W, x1f))
-                y0c = max(0, min(H, y0f)); y1c = max(0, min(H, y1f))
-                if x1c > x0c and y1c > y0c:
-                    canvas[y0c:y1c, x0c:x1c, 0] = int(rgb16[0])
-                    canvas[y0c:y1c, x0c:x1c, 1] = int(rgb16[1])
-                    canvas[y0c:y1c, x0c:x1c, 2] = int(rgb16[2])
-
-                sample_order_list.append((sid.upper(), (x0c, y0c, x1c, y1c)))
-                color_debug_list.append((sid.upper(),
-                                         tuple(map(float, rgb)),
-                                         tuple(map(int, rgb16)),
-                                         (x0c, y0c, x1c, y1c)))
+                if _dbg and sid in ("A1", "M10"):  # choose 1–3 representative patches
+                    print(f"[DEBUG] Check RGB {sid} → rgb_display = {np.clip(rgb, 0.0, 1.0)}")
+
+                patch_sids.append(sid)
+                patch_rgbs.append(rgb)
+                patch_rgb16.append(rgb16)
+
+        k0 = len(sample_sids)
+        sample_sids.extend(patch_sids)
+        sample_rgbf[k0:k0 + len(patch_sids)] = patch_rgbs
+        sample_rgb16[k0:k0 + len(patch_sids)] = patch_rgb16
+
+        # Expand the (nrows, ncols, 3) colour grid by the clamped tile sizes and
+        # store the whole area block at once (zero-width tiles simply vanish)
+        if xe[-1] > xe[0] and ye[-1] > ye[0]:
+            grid = sample_rgb16[k0:k0 + len(patch_sids)].reshape(nrows, ncols, 3)
+            tiles_w = np.diff(xe)
+            tiles_h = np.diff(ye)
+            region = canvas[ye[0]:ye[-1], xe[0]:xe[-1]]
+            if (tiles_w == tiles_w[0]).all() and (tiles_h == tiles_h[0]).all():
+                # Uniform tiles: split the region view into (row, y, col, x) and
+                # broadcast the grid into it, no expanded temporary
+                region.reshape(nrows, tiles_h[0], ncols, tiles_w[0], 3)[...] = grid[:, None, :, None, :]
+            else:
+                region[...] = np.repeat(np.repeat(grid, tiles_h, axis=0), tiles_w, axis=1)
+
+        bb = sample_bboxes[k0:k0 + len(patch_sids)].reshape(nrows, ncols, 4)
+        bb[..., 0] = xe[:-1]
+        bb[..., 1] = ye[:-1, None]
+        bb[..., 2] = xe[1:]
+        bb[..., 3] = ye[1:, None]
 
-                
         # ---------------------- Neighbour detection Start --------------------------
 
         # --- After drawing all patches for this area, draw axis labels ---
@@ -1609,6 +1752,7 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
         tile_h_px = area['tile_y'] * SY
 
         # --- Measure rendered label sizes (used to compute clearance) ---
+        # These images are also the ones drawn for the top/bottom column labels.
         test_imgs_x = [render_text_exact_height(lbl, chosen_font, label_px_target, scale_factor=4)
                        for lbl in labels_x]
         widths_x = [im.size[0] for im in test_imgs_x] if test_imgs_x else [0]
@@ -1626,86 +1770,42 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
         clearance_h_px = (max_label_h if not need_rotate else max_label_w) + 2 * label_gap_px
         clearance_w_px = max_label_w + 2 * label_gap_px
 
-        # --- Helpers using the same coordinate system (pixels with offsets) ---
-        def area_bounds(a):
-            cols = len(generate_labels(a['xstart'], a['xend']))
-            rows = len(generate_labels(a['ystart'], a['yend']))
-            left = a['pre_x'] * SX + offset_x
-            top = a['pre_y'] * SY + offset_y
-            right = left + max(1, cols) * a['tile_x'] * SX
-            bottom = top + max(1, rows) * a['tile_y'] * SY
-            return left, top, right, bottom
-
-        def horiz_gap(a1, a2):
-            """Positive = gap in px between horizontally adjacent areas (0 = touching). -1 = overlap."""
-            l1, _, r1, _ = area_bounds(a1)
-            l2, _, r2, _ = area_bounds(a2)
-            if r1 <= l2:
-                return l2 - r1
-            if r2 <= l1:
-                return l1 - r2
-            return -1
-
-        def vert_gap(a1, a2):
-            """Positive = gap in px between vertically adjacent areas (0 = touching). -1 = overlap."""
-            _, t1, _, b1 = area_bounds(a1)
-            _, t2, _, b2 = area_bounds(a2)
-            if b1 <= t2:
-                return t2 - b1
-            if b2 <= t1:
-                return t1 - b2
-            return -1
-
-        def horiz_overlap(a1, a2):
-            l1, _, r1, _ = area_bounds(a1); l2, _, r2, _ = area_bounds(a2)
-            return not (r1 <= l2 or r2 <= l1)
-
-        def vert_overlap(a1, a2):
-            _, t1, _, b1 = area_bounds(a1); _, t2, _, b2 = area_bounds(a2)
-            return not (b1 <= t2 or b2 <= t1)
-
-        # --- Start with all sides visible, then suppress only the inner faces where necessary ---
-        draw_left_labels   = True
-        draw_right_labels  = True
-        draw_top_labels    = True
-        draw_bottom_labels = True
-
-        # For every other area, detect adjacency within required clearance.
+        # --- All sides visible except inner faces towards a close neighbour ---
+        # For every other area, detect adjacency within required clearance (all at once).
         # If two areas are horizontally adjacent (left/right) and overlap vertically,
         # then suppress the inner faces (right face of left area, left face of right area).
         # If vertically adjacent and overlap horizontally, suppress inner faces analogously.
-        for a in areas:
-            if a is area:
-                continue
-            la, ta, ra, ba = area_bounds(a)
-
-            # --- Horizontal adjacency check ---
-            g = horiz_gap(area, a)
-            if g >= 0 and g < clearance_w_px and vert_overlap(area, a):
-                # This area is left of 'a'
-                if right_px <= la:
-                    draw_right_labels = False  # hide right labels (neighbor immediately on right)
-                    debug_print(f"  → hide RIGHT labels (neighbor {a['xstart']}..{a['xend']} touches on right)")
-                # This area is right of 'a'
-                elif ra <= left_px:
-                    draw_left_labels = False   # hide left labels (neighbor immediately on left)
-                    debug_print(f"  → hide LEFT labels (neighbor {a['xstart']}..{a['xend']} touches on left)")
-
-            # --- Vertical adjacency check ---
-            g = vert_gap(area, a)
-            if g >= 0 and g < clearance_h_px and horiz_overlap(area, a):
-                if bottom_px <= ta:
-                    draw_bottom_labels = False  # hide bottom labels (neighbor below)
-                    debug_print(f"  → hide BOTTOM labels (neighbor {a['xstart']}..{a['xend']} below)")
-                elif ba <= top_px:
-                    draw_top_labels = False     # hide top labels (neighbor above)
-                    debug_print(f"  → hide TOP labels (neighbor {a['xstart']}..{a['xend']} above)")
-
-            debug_print(
-                f"Neighbor flags for area {area['xstart']}..{area['xend']}: "
-                f"L={draw_left_labels}, R={draw_right_labels}, "
-                f"T={draw_top_labels}, B={draw_bottom_labels}"
-            )
+        l1, t1, r1, b1 = area_bounds[ai]
+        others = np.arange(len(areas)) != ai
+        # Gap in px to each area (0 = touching, -1 = overlap)
+        h_gap = np.where(r1 <= nb_l, nb_l - r1, np.where(nb_r <= l1, l1 - nb_r, -1))
+        v_gap = np.where(b1 <= nb_t, nb_t - b1, np.where(nb_b <= t1, t1 - nb_b, -1))
+        h_overlap = ~((r1 <= nb_l) | (nb_r <= l1))
+        v_overlap = ~((b1 <= nb_t) | (nb_b <= t1))
+
+        h_adj = others & (h_gap >= 0) & (h_gap < clearance_w_px) & v_overlap
+        hide_right = h_adj & (right_px <= nb_l)  # neighbour immediately on right
+        hide_left = h_adj & ~(right_px <= nb_l) & (nb_r <= left_px)  # neighbour immediately on left
+        v_adj = others & (v_gap >= 0) & (v_gap < clearance_h_px) & h_overlap
+        hide_bottom = v_adj & (bottom_px <= nb_t)  # neighbour below
+        hide_top = v_adj & ~(bottom_px <= nb_t) & (nb_b <= top_px)  # neighbour above
+
+        draw_left_labels   = not hide_left.any()
+        draw_right_labels  = not hide_right.any()
+        draw_top_labels    = not hide_top.any()
+        draw_bottom_labels = not hide_bottom.any()
+
+        for side, mask, where in (("RIGHT", hide_right, "touches on right"),
+                                  ("LEFT", hide_left, "touches on left"),
+                                  ("BOTTOM", hide_bottom, "below"),
+                                  ("TOP", hide_top, "above")):
+            for j in np.flatnonzero(mask):
+                debug_print(f"  → hide {side} labels (neighbor {areas[j]['xstart']}..{areas[j]['xend']} {where})")
+        debug_print(
+            f"Neighbor flags for area {area['xstart']}..{area['xend']}: "
+            f"L={draw_left_labels}, R={draw_right_labels}, "
+            f"T={draw_top_labels}, B={draw_bottom_labels}"
+        )
         # Future suggestion if desired: clamp label flags with a sanity check (if no space at image edge etc.)
         # (optional, but safe) if area is touching image left edge, still allow left labels
         # The default flags remain; later drawing code will place labels using these flags.
@@ -1742,23 +1842,23 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
         # Column (X-axis) labels
         if draw_top_labels:
             for c, lbl in enumerate(labels_x):
-                imlbl = render_text_exact_height(lbl, chosen_font, label_px_target, scale_factor=4)
+                imlbl = test_imgs_x[c]  # rendered once in the measurement pass
                 tw, th = imlbl.size
                 cx = (x_edges[c] + x_edges[c+1]) // 2
                 px = int(round(cx - tw / 2))
                 py = int(round(top_px - th - label_gap_px))
-                annot.paste(Image.new('L', imlbl.size, 0), (px, py), mask=imlbl)
-                debug_print(f"  → top lbl '{lbl}' at ({px},{py})")
+                draw.bitmap((px, py), imlbl, fill=0)
+                debug_print("  → top lbl '%s' at (%s,%s)", lbl, px, py)
 
         if draw_bottom_labels:
             for c, lbl in enumerate(labels_x):
-                imlbl = render_text_exact_height(lbl, chosen_font, label_px_target, scale_factor=4)
+                imlbl = test_imgs_x[c]  # rendered once in the measurement pass
                 tw, th = imlbl.size
                 cx = (x_edges[c] + x_edges[c+1]) // 2
                 px = int(round(cx - tw / 2))
                 py = int(round(bottom_px + label_gap_px))
-                annot.paste(Image.new('L', imlbl.size, 0), (px, py), mask=imlbl)
-                debug_print(f"  → bottom lbl '{lbl}' at ({px},{py})")
+                draw.bitmap((px, py), imlbl, fill=0)
+                debug_print("  → bottom lbl '%s' at (%s,%s)", lbl, px, py)
 
         # Row (Y-axis) labels
         if draw_left_labels:
@@ -1768,8 +1868,8 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
                 cy = (y_edges[r] + y_edges[r+1]) // 2
                 px = int(round(left_px - tw - label_gap_px))
                 py = int(round(cy - th / 2))
-                annot.paste(Image.new('L', imlbl.size, 0), (px, py), mask=imlbl)
-                debug_print(f"  → left lbl '{lbl}' at ({px},{py})")
+                draw.bitmap((px, py), imlbl, fill=0)
+                debug_print("  → left lbl '%s' at (%s,%s)", lbl, px, py)
 
         if draw_right_labels:
             for r, lbl in enumerate(labels_y):
@@ -1778,8 +1878,8 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
                 cy = (y_edges[r] + y_edges[r+1]) // 2
                 px = int(round(right_px + label_gap_px))
                 py = int(round(cy - th / 2))
-                annot.paste(Image.new('L', imlbl.size, 0), (px, py), mask=imlbl)
-                debug_print(f"  → right lbl '{lbl}' at ({px},{py})")
+                draw.bitmap((px, py), imlbl, fill=0)
+                debug_print("  → right lbl '%s' at (%s,%s)", lbl, px, py)
 
                 
     # --------------------
@@ -1797,14 +1897,8 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
 
     for (fxp, fyp) in fids_px:
         dx = fxp - block_cx; dy = fyp - block_cy
-        if dx < 0 and dy < 0:
-            dirs = [(1,0),(0,1)]
-        elif dx > 0 and dy < 0:
-            dirs = [(-1,0),(0,1)]
-        elif dx > 0 and dy > 0:
-            dirs = [(-1,0),(0,-1)]
-        else:
-            dirs = [(1,0),(0,-1)]
+        quadrant = ((dx > 0) - (dx < 0), (dy > 0) - (dy < 0))
+        dirs = FID_ARM_DIRS.get(quadrant, FID_ARM_DIRS_DEFAULT)
         for vx, vy in dirs:
             x2 = fxp + vx * outer_fid_px; y2 = fyp + vy * outer_fid_px
             draw.line([(fxp, fyp), (x2, y2)], fill=0, width=fid_thick)
@@ -1853,7 +1947,7 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
     header_x = int(round(W - page_margin_mm * px_per_mm - tw))
 
     # Paste text
-    annot.paste(Image.new('L', imhdr.size, 0), (header_x, header_y), mask=imhdr)
+    draw.bitmap((header_x, header_y), imhdr, fill=0)
     debug_print(f"[HEADER] 'Created with rectarg' at ({header_x},{header_y}) "
                 f"(margin={page_margin_mm}mm, gap={text_gap_mm}mm)")
 
@@ -1897,7 +1991,7 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
         ww, hh = imc.size
         px = left_x
         py = nexty
-        annot.paste(Image.new('L', imc.size, 0), (px, py), mask=imc)
+        draw.bitmap((px, py), imc, fill=0)
         nexty += int(round(hh * line_spacing_factor))
     else:
         # still advance spacing even if missing
@@ -1906,14 +2000,14 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
     imdf = render_text_exact_height(f"Data File: {datafile}", chosen_font, footer_font_px, scale_factor=4)
     ww, hh = imdf.size
     px = max(0, min(W - ww, left_x))
-    annot.paste(Image.new('L', imdf.size, 0), (px, nexty), mask=imdf)
+    draw.bitmap((px, nexty), imdf, fill=0)
     nexty += int(round(hh * line_spacing_factor))
 
     imcenter = render_text_exact_height(center_line, chosen_font, footer_font_px, scale_factor=4)
     fw = imcenter.size[0]
     footer_x_center = max(0, int((W - fw)/2.0))
     left_y = max(0, min(H - imcenter.size[1] - 2, left_y))
-    annot.paste(Image.new('L', imcenter.size, 0), (footer_x_center, left_y), mask=imcenter)
+    draw.bitmap((footer_x_center, left_y), imcenter, fill=0)
 
     ry = left_y
 
@@ -1931,111 +2025,87 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
         tw = imr.size[0]
         px = int(round(right_x - tw))
         px = max(0, min(W - tw, px))
-        annot.paste(Image.new('L', imr.size, 0), (px, ry), mask=imr)
+        draw.bitmap((px, ry), imr, fill=0)
         ry += imr.size[1] + 2
 
     # --- Correct anti-aliased black text compositing, blend 
     # inline-rendered labels (and fiducials) into the main canvas ---
-    annot_arr = np.array(annot, dtype=np.float32)  # 0–255 grayscale
-    alpha = (255.0 - annot_arr) / 255.0            # 1.0 = full text, 0.0 = background
-
-    if np.any(alpha > 0):
-        # Draw solid black text using the alpha as opacity
-        for ch in range(3):
-            canvas[..., ch] = (
-                (1.0 - alpha) * canvas[..., ch].astype(np.float32)
-            ).astype(np.uint16)
+    annot_arr = np.asarray(annot, dtype=np.uint8)  # 0–255 grayscale, 255 = background
+
+    inked = annot_arr < 255
+    rows = np.flatnonzero(inked.any(axis=1))
+    if rows.size:
+        # Blend only the bounding box of inked pixels
+        cols = np.flatnonzero(inked.any(axis=0))
+        y0b, y1b = rows[0], rows[-1] + 1
+        x0b, x1b = cols[0], cols[-1] + 1
+        region = canvas[y0b:y1b, x0b:x1b]
+        # Solid black text with opacity (255 - annot)/255 leaves canvas * annot / 255;
+        # done in uint32 fixed point for all channels at once (no float temporaries)
+        blended = np.multiply(region, annot_arr[y0b:y1b, x0b:x1b, None], dtype=np.uint32)
+        blended //= 255
+        region[...] = blended
 
     # Save TIFF (16-bit) or PNG fallback
     outp = Path(out_path)
     if HAVE_TIFF:
+        # Deflate + horizontal predictor: flat patches difference to zeros and
+        # compress very well (lossless; standard TIFF tags 259/317).
         tifffile.imwrite(str(outp), canvas, photometric='rgb',
+                         compression='zlib', predictor=True,
                          resolution=(int(round(used_dpi)), int(round(used_dpi))),
                          resolutionunit='inch')
-    else:
-        tmp = (canvas.astype(np.uint32) >> 8).astype(np.uint8)
+
+    # 8-bit copy shared by the PNG fallback and the preview (uint16 >> 8, no wider temp)
+    tmp = (canvas >> 8).astype(np.uint8) if (output_png or not HAVE_TIFF) else None
+    if not HAVE_TIFF:
         Image.fromarray(tmp).save(str(outp.with_suffix('.png')))
         print("Warning: tifffile not installed — saved 8-bit PNG fallback.", file=sys.stderr)
 
     if output_png and HAVE_TIFF:
-        tmp = (canvas.astype(np.uint32) >> 8).astype(np.uint8)
         Image.fromarray(tmp).save(str(outp.with_suffix('.preview.png')))
 
-    # --- Apply normalization before comparing labels ---
-    defined_labels = set(normalize_sid_global(sid) for sid, _ in sample_order_list)
-    cie_labels = set(normalize_sid_global(k) for k in data_map.keys())
-    missing_labels = defined_labels - cie_labels
-
-
     # --- Extract expected patch count from .cht and .cie files ---
     expected_cht_patches = None
     expected_cie_patches = None
 
     def extract_patch_count_from_file(path):
+        """Return (count, field name it was read from); (None, None) if absent."""
         val = None
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                line_up = line.strip().upper()
-                if line_up.startswith("EXPECTED XYZ"):
-                    parts = re.split(r"\s+", line_up)
-                    if len(parts) >= 3:
-                        try:
-                            val = int(parts[2])
-                            break
-                        except ValueError:
-                            pass
-                elif "PATCHES_ACTIVE" in line_up:
-                    parts = re.split(r"\s+", line_up)
-                    for p in parts:
-                        if p.isdigit():
-                            val = int(p)
-                            break
-                elif "NUMBER_OF_SETS" in line_up:
-                    parts = re.split(r"\s+", line_up)
-                    for p in parts:
-                        if p.isdigit():
-                            val = int(p)
-                            break
-        return val
-
-    expected_cht_patches = extract_patch_count_from_file(cht_path)
-    expected_cie_patches = extract_patch_count_from_file(cie_path)
-    measured_patch_count = len(cie_labels)
-
-    # --- Filter labels that truly exist in defined chart areas ---
-    explicit_labels = set()
-    for area in areas:
-        labels_x = generate_labels(area['xstart'], area['xend'])
-        labels_y = generate_labels(area['ystart'], area['yend'])
-        # If there’s only one row and label is '-', suppress it entirely
-#        if len(labels_y) == 1 and labels_y[0] == '-':
-#            labels_y = ['_']  # placeholder indicating “no row label”
-        # If there’s only one column and label is '-', suppress it entirely
-#        if len(labels_x) == 1 and labels_x[0] == '-':
-#            labels_x = ['_']  # placeholder indicating “no row label”
-            
-        for rlabel in labels_y:
-            for clabel in labels_x:
-                sid = f"{rlabel}{clabel}" if (rlabel and clabel) else (clabel or rlabel)
-                explicit_labels.add(sid.upper())
+        field_name = None
+        data = Path(path).read_bytes()
+        for m in _COUNT_LINE_RE.finditer(data):
+            # stays bytes: ASCII-only strip/upper, int() parses the digits directly
+            line_up = m.group(0).strip().upper()
+            if line_up.startswith(b"EXPECTED XYZ"):
+                parts = _WS_RE.split(line_up)
+                if len(parts) >= 3:
+                    try:
+                        val = int(parts[2])
+                        field_name = "EXPECTED XYZ"
+                        break
+                    except ValueError:
+                        pass
+            elif b"PATCHES_ACTIVE" in line_up or b"NUMBER_OF_SETS" in line_up:
+                for p in _WS_RE.split(line_up):
+                    if p.isdigit():
+                        val = int(p)
+                        field_name = "PATCHES_ACTIVE" if b"PATCHES_ACTIVE" in line_up else "NUMBER_OF_SETS"
+                        break
+        return val, field_name
 
-    truly_missing = sorted([m for m in missing_labels if m in explicit_labels])
+    expected_cht_patches, _ = extract_patch_count_from_file(cht_path)
+    expected_cie_patches, cie_field_name = extract_patch_count_from_file(cie_path)
+    # keys are already normalize_sid_global(k) for every CIE key
+    measured_patch_count = len(rec_by_sid)
 
     # --- Suppress missing warnings if expected counts match ---
+    counts_agree = False
     if expected_cht_patches and expected_cie_patches:
         if expected_cht_patches == expected_cie_patches == measured_patch_count:
-            truly_missing = []
+            counts_agree = True
         else:
-            cie_field_name = "(unknown)"
-            with open(cie_path, "r", encoding="utf-8", errors="ignore") as f:
-                for line in f:
-                    line_up = line.strip().upper()
-                    if "PATCHES_ACTIVE" in line_up:
-                        cie_field_name = "PATCHES_ACTIVE"
-                        break
-                    elif "NUMBER_OF_SETS" in line_up:
-                        cie_field_name = "NUMBER_OF_SETS"
-                        break
+            cie_field_name = cie_field_name or "(unknown)"
 
             print("\n⚠️  Patch count mismatch:")
             print(f"   .cht EXPECTED XYZ:   {expected_cht_patches}")
@@ -2047,88 +2117,119 @@ def recreate(cht_path, cie_path, out_path, target_dpi=DEFAULT_TARGET_DPI,
                 print("   → Warning: .cie contains fewer measured patches than declared.")
 
     elif expected_cie_patches and expected_cie_patches == measured_patch_count:
-        truly_missing = []
+        counts_agree = True
+
+    # --- Compare labels only when the counts leave room for missing patches ---
+    truly_missing = []
+    if not counts_agree:
+        # --- Apply normalization before comparing labels ---
+        defined_labels = set(map(normalize_sid_global, sample_sids))
+        # rec_by_sid's keys view supports the set difference without a copy
+        missing_labels = defined_labels - rec_by_sid.keys()
+
+        # --- Filter labels that truly exist in defined chart areas ---
+        # (a '_' axis yields no labels, so such areas contribute nothing here;
+        # generate_labels output is already upper-case)
+        explicit_labels = {
+            (r + c) if (r and c) else (c or r)
+            for area in areas
+            for r in area['labels_y']
+            for c in area['labels_x']
+        }
+
+        truly_missing = sorted(missing_labels & explicit_labels)
 
     # --- Print results ---
     if truly_missing:
-        print("\n⚠️  Missing patch labels in .cie/.txt (only those actually defined in .cht):")
-        for m in truly_missing[:50]:
-            print("   ", m)
+        lines = ["\n⚠️  Missing patch labels in .cie/.txt (only those actually defined in .cht):"]
+        lines += ["    " + m for m in truly_missing[:50]]
         if len(truly_missing) > 50:
-            print(f"   ... and {len(truly_missing)-50} more")
+            lines.append(f"   ... and {len(truly_missing)-50} more")
+        print("\n".join(lines))
     else:
         debug_print("\n✅  All patch labels accounted for (no missing patches detected).")
         
-    # Diagnostics & verification prints
-    def px2mm(px): return px / (used_dpi / 25.4)
     print()
     print(f"Saved: {outp}  ({W} x {H} px @ {used_dpi} dpi)  (mapping: {mapping_method})")
-    debug_print(f"SX = {SX:.6f} px per .cht-unit, SY = {SY:.6f} px per .cht-unit (used_dpi={used_dpi})")
-    debug_print(f"BOX_SHRINK (cht units): {box_shrink_units:.4f} -> applied shrink: {box_shrink_units*SX:.2f}px x {box_shrink_units*SY:.2f}px")
-    debug_print(f"Margin applied around content: {page_margin_mm:.2f} mm -> {margin_px} px (offset_x={offset_x:.2f}, offset_y={offset_y:.2f}) at {used_dpi} dpi")
-
-    debug_print("\n=== Fiducials (from .cht units -> px) ===")
-    labels = ("Top-left","Top-right","Bottom-right","Bottom-left")
-    for i, (xu,yu) in enumerate(fids_units):
-        px, py = unit_to_px(xu, yu)
-        debug_print(f" {labels[i]:>11}: .cht ({xu:.3f}, {yu:.3f}) -> px ({px+offset_x:.2f}, {py+offset_y:.2f}) -> mm ({px2mm(px+offset_x):.2f}, {px2mm(py+offset_y):.2f})")
-    fxs = [unit_to_px(xu,yu)[0]+offset_x for xu,yu in fids_units]
-    fys = [unit_to_px(xu,yu)[1]+offset_y for xu,yu in fids_units]
-    span_h = max(fxs) - min(fxs); span_v = max(fys) - min(fys)
-    debug_print(f" Fiducial span (px): H = {span_h:.2f} px ({px2mm(span_h):.2f} mm), V = {span_v:.2f} px ({px2mm(span_v):.2f} mm)")
-
-    expected_h_300 = 1825.0; expected_v_300 = 1072.0
-    expected_h = expected_h_300 * (used_dpi / 300.0)
-    expected_v = expected_v_300 * (used_dpi / 300.0)
-    debug_print(f" Reference fiducial span (scaled to target dpi): {expected_h:.2f} px (H) x {expected_v:.2f} px (V)")
-    debug_print(f" Difference: H {span_h - expected_h:.2f} px, V {span_v - expected_v:.2f} px")
-
-    debug_print("\n=== Areas extents (computed from X/Y area lines, origin is .cht (0,0)) ===")
-    for area in areas:
-        axis = area['axis']
-        labels_x = generate_labels(area['xstart'], area['xend'])
-        labels_y = generate_labels(area['ystart'], area['yend'])
-        ncols = len(labels_x); nrows = len(labels_y)
-        left_px = area['pre_x'] * SX + offset_x
-        top_px = area['pre_y'] * SY + offset_y
-        right_px = left_px + max(1, ncols) * area['tile_x'] * SX
-        bottom_px = top_px + max(1, nrows) * area['tile_y'] * SY
-        debug_print(f" Area axis={axis}: start labels X={area['xstart']}..{area['xend']} Y={area['ystart']}..{area['yend']}")
-        debug_print(f"  pre (units) = ({area['pre_x']:.4f}, {area['pre_y']:.4f}), tile (units) = ({area['tile_x']:.4f}, {area['tile_y']:.4f}), post (units)=({area['post_x']:.4f},{area['post_y']:.4f})")
-        debug_print(f"  pixel box: left {left_px:.2f}px ({px2mm(left_px):.2f}mm), top {top_px:.2f}px ({px2mm(top_px):.2f}mm), right {right_px:.2f}px ({px2mm(right_px):.2f}mm), bottom {bottom_px:.2f}px ({px2mm(bottom_px):.2f}mm)")
-        debug_print(f"  counts: cols={ncols}, rows={nrows}")
-
-    rep_area = None
-    for area in areas:
-        if area['axis'] == 'Y':
-            rep_area = area; break
-    if not rep_area:
-        rep_area = areas[0]
-    rep_tile_w_px = rep_area['tile_x'] * SX
-    rep_tile_h_px = rep_area['tile_y'] * SY
-    debug_print("\n=== Representative patch size (from area's tile_x/tile_y) ===")
-    debug_print(f" Patch tile (px) area Y: width = {rep_tile_w_px:.2f} px ({px2mm(rep_tile_w_px):.2f} mm), height = {rep_tile_h_px:.2f} px ({px2mm(rep_tile_h_px):.2f} mm)")
-    for area in areas:
-        if area['axis'] == 'X':
-            gs_h_px = area['tile_y'] * SY
-            debug_print(f" Patch tile height (px) area X: {gs_h_px:.2f} px ({px2mm(gs_h_px):.2f} mm)")
-
-    debug_print("\n=== Sample patch placements (first 12) ===")
-    for i, (sid, bbox) in enumerate(sample_order_list[:12]):
-        x0,y0,x1,y1 = bbox
-        debug_print(f" {sid:6s}: box px ({x0},{y0})-({x1},{y1}) size {x1-x0}x{y1-y0} px")
-
 
-    # --------------------
-    # Debug: assigned patch colors (first N shown)
-    # --------------------
-    if color_debug_list:
-        debug_print("\n=== Debug: assigned patch colors (first 50 shown) ===")
-        for entry in color_debug_list[:50]:
-            sid_dbg, rgbf, rgb16vals, bbox = entry
-            debug_print(f" {sid_dbg:6s} -> RGBf {rgbf[0]:.4f},{rgbf[1]:.4f},{rgbf[2]:.4f}  RGB16 {rgb16vals[0]},{rgb16vals[1]},{rgb16vals[2]}  box {bbox}")
-    else:
-        debug_print("\n(No patch color assignments recorded.)")
+    # Diagnostics & verification prints (skipped entirely, formatting included, without --debug).
+    # _dbg was read once above; inside the block plain print() is enough.
+    if _dbg:
+        def px2mm(px): return px / (used_dpi / 25.4)
+        print(f"SX = {SX:.6f} px per .cht-unit, SY = {SY:.6f} px per .cht-unit (used_dpi={used_dpi})")
+        print(f"BOX_SHRINK (cht units): {box_shrink_units:.4f} -> applied shrink: {box_shrink_units*SX:.2f}px x {box_shrink_units*SY:.2f}px")
+        print(f"Margin applied around content: {page_margin_mm:.2f} mm -> {margin_px} px (offset_x={offset_x:.2f}, offset_y={offset_y:.2f}) at {used_dpi} dpi")
+
+        print("\n=== Fiducials (from .cht units -> px) ===")
+        labels = ("Top-left","Top-right","Bottom-right","Bottom-left")
+        # fids_px already holds unit_to_px_array(fids_units) + offset for every fiducial
+        for i, ((xu,yu), (fx,fy)) in enumerate(zip(fids_units, fids_px)):
+            print(f" {labels[i]:>11}: .cht ({xu:.3f}, {yu:.3f}) -> px ({fx:.2f}, {fy:.2f}) -> mm ({px2mm(fx):.2f}, {px2mm(fy):.2f})")
+        fxs = [p[0] for p in fids_px]
+        fys = [p[1] for p in fids_px]
+        span_h = max(fxs) - min(fxs); span_v = max(fys) - min(fys)
+        print(f" Fiducial span (px): H = {span_h:.2f} px ({px2mm(span_h):.2f} mm), V = {span_v:.2f} px ({px2mm(span_v):.2f} mm)")
+
+        expected_h_300 = 1825.0; expected_v_300 = 1072.0
+        expected_h = expected_h_300 * (used_dpi / 300.0)
+        expected_v = expected_v_300 * (used_dpi / 300.0)
+        print(f" Reference fiducial span (scaled to target dpi): {expected_h:.2f} px (H) x {expected_v:.2f} px (V)")
+        print(f" Difference: H {span_h - expected_h:.2f} px, V {span_v - expected_v:.2f} px")
+
+        # Per-item templates for the loops below, built once
+        fmt_area = (" Area axis=%(axis)s: start labels X=%(xstart)s..%(xend)s Y=%(ystart)s..%(yend)s\n"
+                    "  pre (units) = (%(pre_x).4f, %(pre_y).4f), tile (units) = (%(tile_x).4f, %(tile_y).4f),"
+                    " post (units)=(%(post_x).4f,%(post_y).4f)\n"
+                    "  pixel box: left %(left).2fpx (%(left_mm).2fmm), top %(top).2fpx (%(top_mm).2fmm),"
+                    " right %(right).2fpx (%(right_mm).2fmm), bottom %(bottom).2fpx (%(bottom_mm).2fmm)\n"
+                    "  counts: cols=%(ncols)d, rows=%(nrows)d")
+        fmt_sample = " %-6s: box px (%d,%d)-(%d,%d) size %dx%d px"
+
+        print("\n=== Areas extents (computed from X/Y area lines, origin is .cht (0,0)) ===")
+        for area in areas:
+            left_px = area['pre_x'] * SX + offset_x
+            top_px = area['pre_y'] * SY + offset_y
+            right_px = left_px + max(1, area['ncols']) * area['tile_x'] * SX
+            bottom_px = top_px + max(1, area['nrows']) * area['tile_y'] * SY
+            print(fmt_area % dict(area,
+                                  left=left_px, left_mm=px2mm(left_px), top=top_px, top_mm=px2mm(top_px),
+                                  right=right_px, right_mm=px2mm(right_px),
+                                  bottom=bottom_px, bottom_mm=px2mm(bottom_px)))
+
+        rep_area = None
+        for area in areas:
+            if area['axis'] == 'Y':
+                rep_area = area; break
+        if not rep_area:
+            rep_area = areas[0]
+        rep_tile_w_px = rep_area['tile_x'] * SX
+        rep_tile_h_px = rep_area['tile_y'] * SY
+        print("\n=== Representative patch size (from area's tile_x/tile_y) ===")
+        print(f" Patch tile (px) area Y: width = {rep_tile_w_px:.2f} px ({px2mm(rep_tile_w_px):.2f} mm), height = {rep_tile_h_px:.2f} px ({px2mm(rep_tile_h_px):.2f} mm)")
+        for area in areas:
+            if area['axis'] == 'X':
+                gs_h_px = area['tile_y'] * SY
+                print(f" Patch tile height (px) area X: {gs_h_px:.2f} px ({px2mm(gs_h_px):.2f} mm)")
+
+        print("\n=== Sample patch placements (first 12) ===")
+        for sid, (x0,y0,x1,y1) in zip(sample_sids[:12], sample_bboxes[:12].tolist()):
+            print(fmt_sample % (sid, x0, y0, x1, y1, x1-x0, y1-y0))
+
+
+        # --------------------
+        # Debug: assigned patch colors (first N shown)
+        # --------------------
+        if sample_sids:
+            print("\n=== Debug: assigned patch colors (first 50 shown) ===")
+            # one tolist() per array and a single joined print instead of 50 numpy-scalar formats
+            n_dbg = min(50, len(sample_sids))
+            print("\n".join(
+                f" {sid_dbg:6s} -> RGBf {rf:.4f},{gf:.4f},{bf:.4f}  RGB16 {r16},{g16},{b16}  box {tuple(bbox)}"
+                for sid_dbg, (rf, gf, bf), (r16, g16, b16), bbox in zip(
+                    sample_sids[:n_dbg], sample_rgbf[:n_dbg].tolist(),
+                    sample_rgb16[:n_dbg].tolist(), sample_bboxes[:n_dbg].tolist())))
+        else:
+            print("\n(No patch color assignments recorded.)")
 
     print("\nDone.\n")
 
@@ -2149,6 +2250,7 @@ def main():
     p.add_argument('--font_mm', type=float, nargs=2, metavar=('LABEL_MM','FOOTER_MM'), help='Label and footer text heights in mm. Example: --font_mm 2.0 2.0')
     p.add_argument('--background-color', dest='background_patch', type=str, help='Patch label whose color is used for the image background (e.g. GS10)')
     p.add_argument('--debug', action='store_true', help='Enable parser debug output')
+    p.add_argument('--no-cache', dest='no_cache', action='store_true', help='Do not reuse cached parse results from ~/.cache/rectarg')
 #    p.add_argument(
 #        "--color_space",
 #        choices=["lab", "rgb", "xyz"],
@@ -2186,10 +2288,12 @@ def main():
         help="Page margin in millimeters (default: 15.0 mm)"
     )
     args = p.parse_args()
+    check_dependencies()
 
     # make DEBUG_PARSE visible globally
-    global DEBUG_PARSE
+    global DEBUG_PARSE, USE_PARSE_CACHE
     DEBUG_PARSE = args.debug
+    USE_PARSE_CACHE = not args.no_cache
     
     if not Path(args.cht).exists():
         print(f"Error: .cht file not found: {args.cht}", file=sys.stderr); sys.exit(2)